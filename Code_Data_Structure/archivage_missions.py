@@ -0,0 +1,76 @@
+import os
+import logging
+import argparse
+from modules.log_config import setup_logging
+from modules.inventory import find_missions
+from modules.mission_pack import PACK_EXTENSION, mission_of, pack_mission, unpack_mission
+
+# Configuration du logger : fichier avec rotation + terminal, écrits par un thread dédié (voir modules/log_config.py)
+logger = logging.getLogger(__name__)
+LOG_FILE = "log_archivage.txt"
+
+ACTIONS = ("archiver", "restaurer")
+
+
+def trouver_missions(racine, archivees):
+    """
+    Retourne les dossiers RTE_mission_* (archivees=False) ou les packs RTE_mission_*.zip (archivees=True)
+    d'une mission, d'un dossier mois ou d'une archive entière (voir modules.inventory.find_missions).
+    """
+    missions = find_missions(racine)
+    if archivees:
+        return [mission + PACK_EXTENSION for mission in missions if os.path.isfile(mission + PACK_EXTENSION)]
+    return [mission for mission in missions if os.path.isdir(mission)]
+
+
+def archiver(racine, supprimer=False):
+    """
+    Range chaque mission trouvée sous `racine` dans un seul fichier RTE_mission_*.zip (non compressé) à côté
+    de son dossier. Le pack est lu directement par main.py et vérification_taille_data_V2.py, sans extraction.
+    Avec supprimer=True, le dossier de la mission est supprimé une fois le pack vérifié.
+    """
+    missions = trouver_missions(racine, archivees=False)
+    archivees = 0
+    for mission in missions:
+        if os.path.exists(mission + PACK_EXTENSION):
+            logger.warning(f" Pack déjà existant, mission ignorée : {mission}{PACK_EXTENSION}")
+            continue
+        try:
+            pack_mission(mission, remove_folder=supprimer)
+            archivees += 1
+        except (OSError, ValueError) as e:
+            logger.error(f" Erreur lors de l'archivage de {mission} : {e}")
+    logger.info(f"{archivees}/{len(missions)} missions archivées sous {racine}")
+    return archivees
+
+
+def restaurer(racine, supprimer=False):
+    """Recrée le dossier de chaque mission archivée sous `racine` ; avec supprimer=True, le pack est ensuite supprimé."""
+    packs = trouver_missions(racine, archivees=True)
+    restaurees = 0
+    for pack in packs:
+        try:
+            unpack_mission(pack, remove_pack=supprimer)
+            restaurees += 1
+        except (OSError, ValueError) as e:
+            logger.error(f" Erreur lors de la restauration de {mission_of(pack)} : {e}")
+    logger.info(f"{restaurees}/{len(packs)} missions restaurées sous {racine}")
+    return restaurees
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive les missions dans un fichier unique (zip non compressé), "
+                                                 "ou les restaure en dossiers.")
+    parser.add_argument("action", choices=ACTIONS)
+    parser.add_argument("racine", help="Mission, dossier mois ou archive entière")
+    parser.add_argument("--supprimer", action="store_true",
+                        help="Supprime le dossier (archiver) ou le pack (restaurer) une fois l'opération réussie")
+    args = parser.parse_args()
+
+    setup_logging(LOG_FILE)
+    if not os.path.exists(args.racine) and not os.path.isfile(os.path.normpath(args.racine) + PACK_EXTENSION):
+        logger.error(f"Chemin invalide : {args.racine}")
+    elif args.action == "archiver":
+        archiver(args.racine, args.supprimer)
+    else:
+        restaurer(args.racine, args.supprimer)
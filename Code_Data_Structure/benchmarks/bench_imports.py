@@ -0,0 +1,92 @@
+"""
+Mesure le coût de démarrage (import à froid, dans un nouvel interpréteur) de main.py et de chaque étape
+d'extraction, et le compare à un import immédiat de tous les extracteurs (comportement avant modules/plugins.py).
+
+Exemple (depuis Code_Data_Structure) :
+    python -m benchmarks.bench_imports --repeat 10
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import subprocess
+from statistics import median
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FOLDER = os.path.join(PROJECT_FOLDER, "benchmarks", "results")
+NB_REPETITIONS = 7
+HEAVY_MODULES = ("pandas", "numpy", "PIL")
+
+# Code exécuté dans un interpréteur neuf ; la durée de l'import est mesurée dans ce processus
+SCENARIOS = {
+    "main (plugins paresseux)": "import main",
+    "main + tous les extracteurs": "import main, modules.log_parser, modules.image_metadata, "
+                                   "modules.thumbnails, modules.audio_processor",
+    "organisation_semaineV2": "import organisation_semaineV2",
+    "vérification_taille_data_V2": "import vérification_taille_data_V2",
+}
+for _name in ("logs", "images", "thumbnails", "audio"):
+    SCENARIOS[f"main + étape {_name}"] = f"import main; from modules.plugins import PLUGINS; PLUGINS[{_name!r}].load()"
+
+_PROBE = """
+import sys, json
+from time import perf_counter
+start = perf_counter()
+{code}
+print(json.dumps({{"seconds": perf_counter() - start,
+                   "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(code, repeat=NB_REPETITIONS):
+    """Imports `code` in `repeat` fresh interpreters; returns the best and median times and the heavy modules loaded."""
+    seconds = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(code=code, heavy=HEAVY_MODULES)],
+                                cwd=PROJECT_FOLDER, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds.append(result["seconds"])
+        heavy = result["heavy"]
+    return {"best_s": round(min(seconds), 4), "median_s": round(median(seconds), 4), "heavy_modules": heavy}
+
+
+def run_benchmarks(repeat=NB_REPETITIONS):
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "scenarios": {},
+    }
+    for name, code in SCENARIOS.items():
+        results["scenarios"][name] = measure(code, repeat)
+        data = results["scenarios"][name]
+        logger.info(f"{name:<32} {data['best_s'] * 1000:7.1f} ms (médiane {data['median_s'] * 1000:.1f} ms)"
+                    f"  {', '.join(data['heavy_modules']) or '-'}")
+    return results
+
+
+def save_results(results, results_folder=RESULTS_FOLDER):
+    """Enregistre les résultats dans un fichier horodaté et retourne son chemin."""
+    os.makedirs(results_folder, exist_ok=True)
+    path = os.path.join(results_folder, f"imports_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import à froid de main.py et des extracteurs.")
+    parser.add_argument("--repeat", type=int, default=NB_REPETITIONS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    results = run_benchmarks(args.repeat)
+    lazy = results["scenarios"]["main (plugins paresseux)"]["best_s"]
+    eager = results["scenarios"]["main + tous les extracteurs"]["best_s"]
+    logger.info(f"Démarrage de main.py : {eager * 1000:.1f} ms -> {lazy * 1000:.1f} ms (x{eager / lazy:.1f})")
+    logger.info(f"[Success] Résultats enregistrés dans {save_results(results)}")
@@ -0,0 +1,216 @@
+"""
+Chronomètre les étapes du pipeline sur des missions synthétiques (benchmarks/generate_missions.py)
+à plusieurs échelles, et enregistre les résultats en JSON pour comparer les exécutions entre elles.
+
+Exemple (depuis Code_Data_Structure) :
+    python -m benchmarks.bench_pipeline --scales 1 10 100 --repeat 3
+"""
+import os
+import json
+import glob
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import importlib
+from time import perf_counter
+from statistics import median
+from datetime import datetime
+
+from benchmarks.generate_missions import generate_month
+from modules.log_parser import parse_logs
+from modules.image_metadata import process_images_in_folder
+from modules.audio_processor import process_audio
+from modules.thumbnails import generate_thumbnails
+from organisation_semaineV2 import planifier_archive, appliquer_plan
+
+verification = importlib.import_module("vérification_taille_data_V2")
+
+logger = logging.getLogger(__name__)
+
+# --- Paramètres (Modifiez ici) ---
+SCALES = (1, 10, 100)       # Multiplicateurs du volume de chaque mission
+NB_MISSIONS = 3             # Missions générées par échelle
+NB_REPETITIONS = 3          # Mesures par étape, on garde la meilleure et la médiane
+RESULTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Étapes d'extraction de main.py, appelées mission par mission
+EXTRACTION_STAGES = (
+    ("logs", parse_logs),
+    ("images", process_images_in_folder),
+    ("thumbnails", generate_thumbnails),
+    ("audio", process_audio),
+)
+OUTPUT_FOLDERS = ("logs", "images", "recordings")
+
+
+def clean_outputs(missions):
+    """Supprime les dossiers output pour que la mesure suivante reparte de zéro (manifestes compris)."""
+    for mission in missions:
+        for folder in OUTPUT_FOLDERS:
+            shutil.rmtree(os.path.join(mission, folder, "output"), ignore_errors=True)
+
+
+def folder_stats(folder):
+    """Retourne (nombre de fichiers, taille en Mo) d'une arborescence."""
+    total_bytes, files = verification.scan_folder(folder)
+    return len(files), round(total_bytes / verification.BYTES_PER_MB, 2)
+
+
+def summarize(durations, rerun=None):
+    result = {"best_s": round(min(durations), 4), "median_s": round(median(durations), 4)}
+    if rerun is not None:
+        result["rerun_s"] = round(rerun, 4)     # Deuxième passage, sans rien supprimer (manifestes à jour)
+    return result
+
+
+def bench_extraction(func, missions, repeat):
+    """Mesure une étape à froid (`repeat` fois), puis une relance sur les sorties déjà produites."""
+    durations = []
+    for _ in range(repeat):
+        clean_outputs(missions)
+        start = perf_counter()
+        for mission in missions:
+            func(mission)
+        durations.append(perf_counter() - start)
+    start = perf_counter()
+    for mission in missions:
+        func(mission)
+    return summarize(durations, perf_counter() - start)
+
+
+def bench_size_checker(missions, workdir, repeat):
+    """Mesure check_mission sur chaque mission, la première servant de référence."""
+    manifest = verification.build_reference_manifest(missions[0], os.path.join(workdir, "reference_manifest.json"))
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for mission in missions:
+            verification.check_mission(mission, manifest)
+        durations.append(perf_counter() - start)
+    return summarize(durations)
+
+
+def bench_organiser(archive, repeat):
+    """Mesure la planification et le déplacement des missions d'une archive non triée, puis remet tout en place."""
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        plan = planifier_archive(archive)
+        appliquer_plan(plan, dry_run=False)
+        durations.append(perf_counter() - start)
+        for _, _, source, destination in plan:
+            os.rename(destination, source)
+            if not os.listdir(os.path.dirname(destination)):
+                os.rmdir(os.path.dirname(destination))
+    return summarize(durations)
+
+
+def bench_scale(workdir, scale, nb_missions, repeat):
+    """Génère les données d'une échelle et chronomètre chaque étape."""
+    scale_folder = os.path.join(workdir, f"x{scale}")
+
+    start = perf_counter()
+    month_folder, missions = generate_month(os.path.join(scale_folder, "trie"), nb_missions, scale)
+    archive = os.path.join(scale_folder, "non_trie")
+    generate_month(archive, nb_missions, scale, organised=False)
+    generation = perf_counter() - start
+
+    nb_files, size_mb = folder_stats(month_folder)
+    result = {
+        "missions": nb_missions,
+        "files": nb_files,
+        "size_mb": size_mb,
+        "generation_s": round(generation, 2),
+        "stages": {},
+    }
+    for stage, func in EXTRACTION_STAGES:
+        result["stages"][stage] = bench_extraction(func, missions, repeat)
+    clean_outputs(missions)
+    result["stages"]["size_checker"] = bench_size_checker(missions, scale_folder, repeat)
+    result["stages"]["organiser"] = bench_organiser(archive, repeat)
+    return result
+
+
+def run_benchmarks(scales=SCALES, nb_missions=NB_MISSIONS, repeat=NB_REPETITIONS, workdir=None, keep=False):
+    """Lance toutes les échelles dans un dossier temporaire et retourne les résultats."""
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "scales": {},
+    }
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_splashtop_")
+    try:
+        for scale in scales:
+            logger.info(f"Échelle x{scale} : génération de {nb_missions} missions...")
+            # Les étapes journalisent chaque fichier traité : on les fait taire pendant les mesures
+            logging.disable(logging.WARNING)
+            try:
+                results["scales"][str(scale)] = bench_scale(workdir, scale, nb_missions, repeat)
+            finally:
+                logging.disable(logging.NOTSET)
+            for stage, timing in results["scales"][str(scale)]["stages"].items():
+                logger.info(f"  x{scale} {stage:<13} meilleur {timing['best_s']:.3f} s, médiane {timing['median_s']:.3f} s")
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def save_results(results, results_folder=RESULTS_FOLDER):
+    """Enregistre les résultats dans un fichier horodaté et retourne son chemin."""
+    os.makedirs(results_folder, exist_ok=True)
+    path = os.path.join(results_folder, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    return path
+
+
+def latest_results(results_folder=RESULTS_FOLDER, exclude=None):
+    """Retourne le chemin du dernier fichier de résultats (None s'il n'y en a pas)."""
+    paths = sorted(path for path in glob.glob(os.path.join(results_folder, "bench_*.json")) if path != exclude)
+    return paths[-1] if paths else None
+
+
+def compare_results(previous, current):
+    """Retourne, pour chaque échelle et étape communes, (échelle, étape, avant, après, accélération)."""
+    rows = []
+    for scale, data in current["scales"].items():
+        old = previous.get("scales", {}).get(scale)
+        if old is None:
+            continue
+        for stage, timing in data["stages"].items():
+            if stage in old["stages"] and timing["best_s"] > 0:
+                before = old["stages"][stage]["best_s"]
+                rows.append((scale, stage, before, timing["best_s"], before / timing["best_s"]))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline sur des missions synthétiques.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--missions", type=int, default=NB_MISSIONS)
+    parser.add_argument("--repeat", type=int, default=NB_REPETITIONS)
+    parser.add_argument("--workdir", help="Dossier de travail (temporaire par défaut)")
+    parser.add_argument("--keep", action="store_true", help="Conserver les données générées")
+    parser.add_argument("--compare", help="Résultats de référence (par défaut : le dernier fichier de results/)")
+    args = parser.parse_args()
+
+    logging.getLogger().handlers.clear()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    results = run_benchmarks(args.scales, args.missions, args.repeat, args.workdir, args.keep)
+    results_path = save_results(results)
+    logger.info(f"[Success] Résultats enregistrés dans {results_path}")
+
+    reference = args.compare or latest_results(exclude=results_path)
+    if reference:
+        with open(reference, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        logger.info(f"Comparaison avec {reference} :")
+        for scale, stage, before, after, speedup in compare_results(previous, results):
+            logger.info(f"  x{scale} {stage:<13} {before:.3f} s -> {after:.3f} s (x{speedup:.2f})")
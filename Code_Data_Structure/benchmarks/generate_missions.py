@@ -0,0 +1,152 @@
+"""
+Génère localement des missions synthétiques réalistes pour mesurer les performances sans les lecteurs réseau.
+
+Exemple (depuis Code_Data_Structure) :
+    python -m benchmarks.generate_missions Test_Synthétique --missions 5 --scale 10
+"""
+import os
+import csv
+import wave
+import random
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+
+from organisation_semaineV2 import MOIS_MAP, numero_semaine_du_mois
+
+CAMERAS = ("front_camera", "optical_camera", "radiometric_camera", "rear_camera", "uv_camera")
+NOMS_MOIS = {numero: nom for nom, numero in MOIS_MAP.items()}
+
+# Volumes de base, multipliés par `scale`
+BASE_IMAGES_PER_CAMERA = 2
+BASE_LOG_ROWS = 200
+BASE_AUDIO_SECONDS = 1
+
+IMAGE_SIZE = (320, 240)
+SAMPLE_RATE = 16000
+
+
+def mission_name(polarity, moment):
+    """Nom de dossier au format Splashtop : RTE_mission_neg_2024-11-27_10_40_11."""
+    return f"RTE_mission_{polarity}_{moment:%Y-%m-%d_%H_%M_%S}"
+
+
+def write_image(path, moment, rng):
+    """Écrit un JPEG bruité portant les tags EXIF lus par ImageMetadata."""
+    pixels = rng.integers(0, 256, size=(IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.uint8)
+    image = Image.fromarray(pixels, "RGB")
+    exif = Image.Exif()
+    exif[0x0110] = "Synthetic MK4.2 camera"                 # Model
+    exif[0x0128] = 2                                        # ResolutionUnit
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[0x9003] = f"{moment:%Y:%m:%d %H:%M:%S}"        # DateTimeOriginal
+    exif_ifd[0x9400] = IFDRational(int(rng.integers(-50, 400)), 10)      # AmbientTemperature
+    exif_ifd[0x9401] = IFDRational(int(rng.integers(200, 950)), 10)      # Humidity
+    exif_ifd[0x9402] = IFDRational(int(rng.integers(98000, 103000)), 1)  # Pressure
+    image.save(path, "JPEG", quality=85, exif=exif)
+
+
+def write_logs(logs_folder, moment, rows, rng):
+    """Écrit un CSV de diagnostics (colonne Message) et un CSV capteurs (colonne Unit)."""
+    with open(os.path.join(logs_folder, "inspection_diagnostics.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "Level", "Message"])
+        for i in range(rows):
+            writer.writerow([(moment + timedelta(seconds=i)).isoformat(sep=" "),
+                             rng.choice(["INFO", "INFO", "WARNING", "ERROR"]),
+                             f"IP{int(rng.integers(1, 30))} inspection step {i} done"])
+
+    with open(os.path.join(logs_folder, "inspection_sensor_logs.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "Sensor", "Value", "Unit"])
+        sensors = (("temperature", "°C", 20.0), ("humidity", "%", 55.0), ("pressure", "Pa", 101325.0))
+        for i in range(rows):
+            name, unit, base = sensors[i % len(sensors)]
+            writer.writerow([(moment + timedelta(seconds=i)).isoformat(sep=" "), name,
+                             round(base + float(rng.normal(0, 1)), 2), unit])
+
+
+def write_audio(path, seconds, rng):
+    """Écrit un WAV PCM 16 bits mono : bourdonnement 100 Hz et harmoniques, plus du bruit."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = 0.3 * np.sin(2 * np.pi * 100 * t) + 0.1 * np.sin(2 * np.pi * 300 * t)
+    signal += rng.normal(0, 0.05, size=t.size)
+    samples = np.clip(signal * 32767, -32768, 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+
+def generate_mission(mission_folder, moment, scale=1, seed=0):
+    """Crée une mission complète : images/<caméra>, logs/ et recordings/."""
+    rng = np.random.default_rng(seed)
+    images_per_camera = BASE_IMAGES_PER_CAMERA * scale
+
+    for camera in CAMERAS:
+        camera_folder = os.path.join(mission_folder, "images", camera)
+        os.makedirs(camera_folder, exist_ok=True)
+        for i in range(images_per_camera):
+            point = i % 25 + 1
+            write_image(os.path.join(camera_folder, f"IP{point}_IT_{i // 25 + 1}.jpeg"),
+                        moment + timedelta(seconds=10 * i), rng)
+        if camera == "radiometric_camera" and images_per_camera:
+            write_image(os.path.join(camera_folder, "IP1_IT_1_annotated.jpeg"), moment, rng)
+
+    logs_folder = os.path.join(mission_folder, "logs")
+    os.makedirs(logs_folder, exist_ok=True)
+    write_logs(logs_folder, moment, BASE_LOG_ROWS * scale, rng)
+
+    recordings_folder = os.path.join(mission_folder, "recordings")
+    os.makedirs(recordings_folder, exist_ok=True)
+    write_audio(os.path.join(recordings_folder, "microphone_IP10_IT_2.wav"), BASE_AUDIO_SECONDS * scale, rng)
+
+
+def working_days(start, count):
+    """Retourne `count` jours ouvrés à partir de `start`."""
+    days = []
+    current = start
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def generate_month(root, missions=5, scale=1, start=date(2024, 11, 4), polarity="neg", organised=True, seed=0):
+    """
+    Génère un dossier mois (ex : Novembre_2024_neg) contenant `missions` missions, une par jour ouvré.
+    organised=True les range dans 'Semaine X' comme après organisation_semaineV2.py, sinon elles restent à plat.
+    Retourne le chemin du dossier mois et la liste des missions.
+    """
+    month_folder = os.path.join(root, f"{NOMS_MOIS[start.month]}_{start.year}_{polarity}")
+    created = []
+    random.seed(seed)
+    for index, day in enumerate(working_days(start, missions)):
+        moment = datetime(day.year, day.month, day.day, random.randint(0, 23), random.randint(0, 59),
+                          random.randint(0, 59))
+        parent = month_folder
+        if organised:
+            parent = os.path.join(month_folder, f"Semaine {numero_semaine_du_mois(day.year, day.month, day.day)}")
+        mission_folder = os.path.join(parent, mission_name(polarity, moment))
+        generate_mission(mission_folder, moment, scale, seed + index)
+        created.append(mission_folder)
+    return month_folder, created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère des missions Splashtop synthétiques.")
+    parser.add_argument("root", help="Dossier dans lequel créer le dossier mois")
+    parser.add_argument("--missions", type=int, default=5, help="Nombre de missions (une par jour ouvré)")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplie images, lignes de logs et durée audio")
+    parser.add_argument("--polarity", choices=("neg", "pos"), default="neg")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2024, 11, 4), help="Premier jour (AAAA-MM-JJ)")
+    parser.add_argument("--flat", action="store_true", help="Ne pas ranger les missions dans 'Semaine X'")
+    args = parser.parse_args()
+
+    folder, _ = generate_month(args.root, args.missions, args.scale, args.start, args.polarity, not args.flat)
+    print(f"Missions générées dans {folder}")
@@ -1,30 +1,40 @@
 import os
+import time
+import argparse
 import logging
-from modules.log_parser import parse_logs
-from modules.image_metadata import ImageMetadata, process_images_in_folder
-from modules.audio_processor import AudioProcessor, process_audio
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.catalog import MetadataCatalog
+from modules.inventory import scan_tree, isdir, listdir, find_missions
+from modules.timing import summarize_run, save_report
+from modules.log_config import setup_logging
+from modules.journal import RunJournal
+from modules.pipeline import MISSION_STAGES, timed_mission, process_mission_worker, journal_mission, import_catalog
 
-logging.basicConfig(
-    level=logging.INFO,  # Niveau des logs (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-    format="%(asctime)s - %(levelname)s - %(message)s",  # Format du message
-    handlers=[
-        logging.FileHandler("log_métadonnée.txt"),  # Enregistre les logs dans un fichier
-        logging.StreamHandler()  # Affiche les logs dans le terminal
-    ]
-)
+logger = logging.getLogger(__name__)  # Création du logger (configuré par setup_logging au lancement du script)
 
-logger = logging.getLogger(__name__)  # Création du logger
+LOG_FILE = "log_métadonnée.txt"     # Fichier de log, avec rotation (log_métadonnée.txt.1, .2...)
 
 EXPECTED_WEEKS = {"Semaine 1", "Semaine 2", "Semaine 3", "Semaine 4", "Semaine 5"}
+
+NB_PROCESSUS = 1    # Nombre de missions traitées en parallèle, 1 = mode séquentiel par défaut (Modifiez ici)
+CATALOG_PATH = None  # Chemin d'un catalogue SQLite alimenté après chaque mission, ex : "catalogue_metadonnees.sqlite"
+TIMING_REPORT = "rapport_performances.json"    # Durée, fichiers/s et Mo traités par étape et par caméra (None = pas de rapport)
+PROFILE_SLOWEST = 0  # Nombre de missions les plus lentes dont le profil cProfile est conservé, 0 = pas de profilage
+PROFILE_FOLDER = "profils"  # Dossier des fichiers .prof (à ouvrir avec `python -m pstats` ou snakeviz)
+AGGREGATE_MISSION_LOGS = False  # True : une ligne de résumé par mission au lieu d'une ligne par fichier traité
+JOURNAL_FILE = "journal_traitement.jsonl"  # Journal des étapes terminées, relu par `python main.py --resume` (None = pas de journal)
+
+# Les étapes d'extraction d'une mission (MISSION_STAGES) et leur exécution sont dans modules/pipeline.py,
+# partagé avec traitement_lot.py
     
-def is_correctly_structured(folder_path):
+def is_correctly_structured(folder_path, inventory=None):
     """Vérifie si le dossier contient au moins un des dossiers de semaine attendus"""
-    if not os.path.isdir(folder_path):
+    if not isdir(folder_path, inventory):
         logger.error(f"Le chemin n'est pas un dossier valide : {folder_path}")
         return False
 
-    found_folders = {name for name in os.listdir(folder_path)
-                     if os.path.isdir(os.path.join(folder_path, name))}
+    found_folders = {name for name in listdir(folder_path, inventory)
+                     if isdir(os.path.join(folder_path, name), inventory)}
 
     matching_weeks = EXPECTED_WEEKS.intersection(found_folders)
 
@@ -36,35 +46,135 @@ def is_correctly_structured(folder_path):
         logger.info(f"Dossiers trouvés : {found_folders}")
         return False
 
-def process_folder(folder_path):
+def _profile_path(rte_neg_path, profile):
+    """Fichier .prof d'une mission, ou None si le profilage est désactivé."""
+    if not profile:
+        return None
+    os.makedirs(PROFILE_FOLDER, exist_ok=True)
+    return os.path.join(PROFILE_FOLDER, f"{os.path.basename(os.path.normpath(rte_neg_path))}.prof")
+
+def _keep_slowest_profiles(mission_timings, count):
+    """Garde les profils cProfile des `count` missions les plus lentes et supprime les autres."""
+    ranked = sorted(mission_timings, key=lambda mission: mission["wall_s"], reverse=True)
+    kept = []
+    for rank, mission in enumerate(ranked):
+        profile_path = _profile_path(mission["mission"], True)
+        if not os.path.exists(profile_path):
+            continue
+        if rank < count:
+            kept.append(profile_path)
+            logger.info(f"Profil cProfile de {mission['mission']} ({mission['wall_s']:.2f} s) : {profile_path}")
+        else:
+            os.remove(profile_path)
+    return kept
+
+def _report_timings(mission_timings, elapsed, workers, report_path, profile_slowest):
+    """Affiche le temps passé dans chaque étape et écrit le rapport de performances JSON."""
+    profiles = _keep_slowest_profiles(mission_timings, profile_slowest) if profile_slowest else []
+    report = summarize_run(mission_timings, elapsed, workers=workers, profiles=profiles)
+    for stage, total in report["stages"].items():
+        logger.info(f"Étape {stage} : {total['wall_s']:.2f} s cumulées, {total['files']} fichiers, "
+                    f"{total['input_mb']:.1f} Mo, {total['files_per_s'] or 0:.1f} fichiers/s")
+    if report_path and mission_timings:        # Reprise sans mission restante : le dernier rapport est conservé
+        save_report(report, report_path)
+        logger.info(f"[Success] Rapport de performances enregistré : {report_path}")
+    return report
+
+def process_folder(folder_path, workers=NB_PROCESSUS, catalog_path=CATALOG_PATH, inventory=None,
+                   report_path=TIMING_REPORT, profile_slowest=PROFILE_SLOWEST, aggregate=AGGREGATE_MISSION_LOGS,
+                   journal_path=JOURNAL_FILE, resume=False):
+    """
+    Extrait les métadonnées de toutes les missions d'un dossier et écrit le rapport de performances.
+    Chaque étape terminée est inscrite dans le journal (`journal_path`) ; avec resume=True, la dernière
+    exécution sur ce dossier est reprise : seules les étapes en échec ou non terminées sont relancées.
+    """
     # Vérifier si le dossier donné en entrée est valide
     if not os.path.isdir(folder_path):
         logger.warning(f"Le chemin spécifié n'est pas un dossier valide: {folder_path}")
         return
-    for i in os.listdir(folder_path): #Parcours des dossiers semaines
-        subfolder_path = os.path.join(folder_path, i)
-
-        # Parcours des sous-dossiers pour extraire les métadonnées
-        for j in os.listdir(subfolder_path):
-            rte_neg_path = os.path.join(subfolder_path, j)
-            # Appel des fonctions pour traiter les logs, les images et les fichiers audio
-            logger.info(f"[Success] Traitement du dossier: {rte_neg_path}")
-            
-            # Traiter les logs
-            parse_logs(rte_neg_path)
-            
-            # Traiter les images
-            process_images_in_folder(rte_neg_path)
-            
-            # Traiter l'audio
-            process_audio(rte_neg_path)
+
+    # Un seul parcours de l'arborescence, réutilisé par toutes les étapes
+    if inventory is None:
+        inventory = scan_tree(folder_path)
+    missions = find_missions(folder_path, inventory)
+    journal = RunJournal(journal_path, folder_path, resume) if journal_path else None
+    skips = {path: journal.completed(path) if journal else set() for path in missions}
+    all_stages = {stage for stage, _ in MISSION_STAGES} | ({"catalog"} if catalog_path else set())
+    finished = [path for path in missions if skips[path] >= all_stages]
+    if finished:
+        logger.info(f"[Skipped] {len(finished)} missions déjà terminées lors de l'exécution reprise")
+        missions = [path for path in missions if path not in finished]
+    # Le catalogue n'est alimenté que par ce processus : SQLite supporte mal les écritures concurrentes
+    catalog = MetadataCatalog(catalog_path) if catalog_path else None
+    start = time.perf_counter()
+
+    try:
+        if workers <= 1 or len(missions) <= 1:
+            # Parcours des sous-dossiers pour extraire les métadonnées
+            mission_timings = []
+            for rte_neg_path in missions:
+                timings = timed_mission(rte_neg_path, inventory=inventory,
+                                        profile_path=_profile_path(rte_neg_path, profile_slowest),
+                                        aggregate=aggregate, skip=skips[rte_neg_path])
+                journal_mission(journal, timings)
+                mission_timings.append(timings)
+                import_catalog(catalog, rte_neg_path, journal, skips[rte_neg_path])
+            elapsed = time.perf_counter() - start
+            logger.info(f"{len(missions)} missions traitées en {elapsed:.2f} s (mode séquentiel)")
+        else:
+            mission_timings, elapsed = _process_missions_in_parallel(missions, workers, catalog, start, inventory,
+                                                                     profile_slowest, aggregate, journal, skips)
+    finally:
+        if catalog:
+            catalog.close()
+
+    return _report_timings(mission_timings, elapsed, max(1, min(workers, len(missions))), report_path, profile_slowest)
+
+def _process_missions_in_parallel(missions, workers, catalog, start, inventory, profile_slowest=0, aggregate=False,
+                                  journal=None, skips=None):
+    """Répartit les missions sur un pool de processus puis réaffiche leurs logs dans l'ordre."""
+    results = {}
+    skips = skips or {}
+    level = logging.getLogger().getEffectiveLevel()     # Non hérité par les processus lancés en "spawn" (Windows)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Chaque processus ne reçoit que l'inventaire de sa mission
+        futures = {executor.submit(process_mission_worker, path, inventory.subtree(path),
+                                   _profile_path(path, profile_slowest), aggregate, skips.get(path, set()),
+                                   level): path
+                   for path in missions}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            journal_mission(journal, results[futures[future]][0])     # Dès la fin de la mission, pas à la réémission
+    elapsed = time.perf_counter() - start
+
+    # Réémission des logs mission par mission, dans l'ordre alphabétique des missions
+    cumulative = 0.0
+    mission_timings = []
+    for rte_neg_path in missions:
+        timings, records = results[rte_neg_path]
+        mission_timings.append(timings)
+        cumulative += timings["wall_s"]
+        for data in records:
+            logging.getLogger(data["name"]).handle(logging.makeLogRecord(data))
+        import_catalog(catalog, rte_neg_path, journal, skips.get(rte_neg_path, set()))
+
+    logger.info(f"{len(missions)} missions traitées en {elapsed:.2f} s avec {workers} processus "
+                f"(temps cumulé des missions : {cumulative:.2f} s, accélération estimée ≈ x{cumulative / elapsed:.1f}, "
+                f"sans mesure du mode séquentiel)")
+    return mission_timings, elapsed
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction des métadonnées des missions d'un dossier.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprend la dernière exécution interrompue sur ce dossier (étapes terminées ignorées)")
+    args = parser.parse_args()
+    setup_logging(LOG_FILE)
     # Demander à l'utilisateur de spécifier le chemin du dossier
     folder_path = input("Veuillez entrer le chemin du dossier contenant les sous-dossiers 'RTE_neg' : ").strip()
     
-    if is_correctly_structured(folder_path):
-        process_folder(folder_path)  # Appeler la fonction pour traiter ce dossier
+    inventory = scan_tree(folder_path) if os.path.isdir(folder_path) else None
+    if is_correctly_structured(folder_path, inventory):
+        process_folder(folder_path, inventory=inventory, resume=args.resume)  # Appeler la fonction pour traiter ce dossier
     else:
         logger.error("Structure invalide. Veuillez d'abord exécuter `organisation_semaine.py` pour organiser les données.")
 
@@ -1,18 +1,157 @@
 import os
 import json
 import wave
+import struct
 import logging
+import numpy as np
+from modules.manifest import load_manifest, save_manifest, scan_inputs
+from modules.inventory import exists
+from modules.timing import timed
+from modules.json_writer import atomic_open
+from modules.mission_pack import open_input, input_exists, input_size, locate
 
 logger = logging.getLogger(__name__)
 
+BLOCK_FRAMES = 65536        # Nombre de trames lues par bloc (borne la mémoire pour les longs enregistrements)
+FREQUENCY_BANDS = ((0, 250), (250, 1000), (1000, 4000), (4000, None))    # Bandes en Hz, None = Nyquist
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+RAW_DTYPES = {1: np.uint8, 2: np.dtype("<i2"), 3: np.uint8, 4: np.dtype("<i4")}    # Type brut par taille d'échantillon
+
+
+def decode_samples(samples, sample_width):
+    """Converts raw PCM samples (as stored in the file) into signed integers."""
+    if sample_width == 1:                       # PCM 8 bits non signé
+        return samples.astype(np.int32) - 128
+    if sample_width == 2:
+        return samples.astype(np.int32)
+    if sample_width == 3:                       # PCM 24 bits : 3 octets little-endian par échantillon
+        octets = samples.astype(np.int32)
+        values = octets[..., 0] | (octets[..., 1] << 8) | (octets[..., 2] << 16)
+        return (values << 8) >> 8               # Extension du signe
+    if sample_width == 4:
+        return samples.astype(np.int64)         # int64 : abs(-2**31) déborde en int32
+    raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+
+def frames_to_array(raw, sample_width, channels):
+    """Decodes PCM frames into an integer array of shape (frames, channels)."""
+    if sample_width not in RAW_DTYPES:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+    samples = np.frombuffer(raw, dtype=RAW_DTYPES[sample_width])
+    shape = (-1, channels, 3) if sample_width == 3 else (-1, channels)
+    return decode_samples(samples.reshape(shape), sample_width)
+
+
+class WavMemmap:
+    """
+    Read-only, zero-copy view of the PCM samples of a WAV file.
+    `samples` is a numpy.memmap of shape (frames, channels) — (frames, channels, 3) raw bytes for 24-bit PCM —
+    so any time window can be sliced without reading the rest of the file. In a packed mission the samples are
+    mapped straight from the pack (members are stored uncompressed).
+    Raises ValueError for compressed, float or malformed files (use the wave module instead).
+    """
+
+    def __init__(self, audio_path):
+        self.audio_path = audio_path
+        file_size = input_size(audio_path)
+        fmt = None
+        data_offset = data_size = None
+
+        with open_input(audio_path) as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                raise ValueError("Not a RIFF/WAVE file")
+            while True:                         # Parcours des chunks jusqu'au chunk 'data'
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                    f.seek(chunk_size % 2, 1)
+                elif chunk_id == b"data":
+                    data_offset, data_size = f.tell(), chunk_size
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, 1)     # Les chunks sont alignés sur 2 octets
+
+        if fmt is None or len(fmt) < 16 or data_offset is None:
+            raise ValueError("Missing 'fmt ' or 'data' chunk")
+        format_tag, self.channels, self.frame_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack("<H", fmt[24:26])[0]    # Deux premiers octets du GUID du sous-format
+        if format_tag != WAVE_FORMAT_PCM:
+            raise ValueError(f"Unsupported WAV encoding (format tag {format_tag:#06x})")
+        if not self.channels or block_align != self.channels * ((bits + 7) // 8):
+            raise ValueError("Inconsistent 'fmt ' chunk")
+
+        self.sample_width = block_align // self.channels
+        if self.sample_width not in RAW_DTYPES:
+            raise ValueError(f"Unsupported sample width: {self.sample_width} bytes")
+        data_size = min(data_size, file_size - data_offset)   # Fichier tronqué : on s'arrête à la fin réelle
+        self.frames = data_size // block_align
+        if self.frames == 0:
+            raise ValueError("Empty 'data' chunk")
+
+        shape = (self.frames, self.channels, 3) if self.sample_width == 3 else (self.frames, self.channels)
+        mapped_path, base_offset = locate(audio_path)      # Le pack et la position du fichier dans le pack
+        self.samples = np.memmap(mapped_path, dtype=RAW_DTYPES[self.sample_width], mode="r",
+                                 offset=base_offset + data_offset, shape=shape)
+
+    @property
+    def duration(self):
+        return self.frames / self.frame_rate
+
+    def window(self, start_seconds, end_seconds):
+        """Returns the raw samples between two instants, as a view on the file (no copy)."""
+        start = max(0, int(start_seconds * self.frame_rate))
+        end = min(self.frames, int(end_seconds * self.frame_rate))
+        return self.samples[start:end]
+
+    def decode(self, samples):
+        """Converts a slice of `samples` into signed integers (this one copies)."""
+        return decode_samples(samples, self.sample_width)
+
+
+def iter_pcm_blocks(audio_path, block_frames=BLOCK_FRAMES):
+    """
+    Returns (frame_rate, sample_width, blocks) where blocks yields decoded integer arrays of shape
+    (frames, channels). Uses the memory-mapped reader, or wave.readframes if the header is not plain PCM.
+    """
+    try:
+        wav = WavMemmap(audio_path)
+        blocks = (wav.decode(wav.samples[i:i + block_frames]) for i in range(0, wav.frames, block_frames))
+        return wav.frame_rate, wav.sample_width, blocks
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"Memory-mapped reading impossible for {audio_path}, using wave: {e}")
+
+    with open_input(audio_path) as f, wave.open(f, 'rb') as wav_file:
+        frame_rate, sample_width = wav_file.getframerate(), wav_file.getsampwidth()
+
+    def read_blocks():
+        with open_input(audio_path) as f, wave.open(f, 'rb') as wav_file:
+            channels = wav_file.getnchannels()
+            while True:
+                raw = wav_file.readframes(block_frames)
+                if not raw:
+                    break
+                yield frames_to_array(raw, sample_width, channels)
+
+    return frame_rate, sample_width, read_blocks()
+
+
 class AudioProcessor:
+    @timed("audio", path_arg=1)
     def extract_audio_metadata(self, audio_path):
         """Extract metadata from an audio file."""
-        with wave.open(audio_path, 'rb') as wav_file:
+        with open_input(audio_path) as f, wave.open(f, 'rb') as wav_file:
             metadata = {                                #Structure des métadonnées
                 "FileName": os.path.basename(audio_path),
                 "Folder": os.path.dirname(audio_path),
-                "Filesize": f"{os.path.getsize(audio_path) / 1024:.2f} KB",
+                "Filesize": f"{input_size(audio_path) / 1024:.2f} KB",
                 "Channels": wav_file.getnchannels(),
                 "SampleRate": f"{wav_file.getframerate()} Hz",
                 "BitDepth": f"{wav_file.getsampwidth() * 8} bits",
@@ -20,36 +159,124 @@ class AudioProcessor:
             }
         return metadata
 
+    @timed("audio", path_arg=1, count_file=False)
+    def extract_signal_statistics(self, audio_path, block_frames=BLOCK_FRAMES):
+        """
+        Computes RMS, peak, crest factor, clipping ratio and FFT band energies of a WAV file,
+        block by block (memory-mapped when possible) so that only `block_frames` frames are decoded at a time.
+        """
+        frame_rate, sample_width, blocks = iter_pcm_blocks(audio_path, block_frames)
+        full_scale = float(2 ** (sample_width * 8 - 1))
+
+        sum_squares = 0.0
+        peak = 0
+        clipped = 0
+        sample_count = 0
+        band_energies = np.zeros(len(FREQUENCY_BANDS))
+
+        for block in blocks:
+            sum_squares += np.sum(np.square(block, dtype=np.float64))
+            peak = max(peak, int(np.abs(block).max()))
+            clipped += int(np.count_nonzero((block >= full_scale - 1) | (block <= -full_scale)))
+            sample_count += block.size
+
+            # Spectre du bloc (moyenne des canaux) réparti par bande de fréquence
+            power = np.abs(np.fft.rfft(block.mean(axis=1))) ** 2
+            frequencies = np.fft.rfftfreq(block.shape[0], d=1.0 / frame_rate)
+            for i, (low, high) in enumerate(FREQUENCY_BANDS):
+                mask = frequencies >= low if high is None else (frequencies >= low) & (frequencies < high)
+                band_energies[i] += power[mask].sum()
+
+        if sample_count == 0:
+            return None
+
+        rms = np.sqrt(sum_squares / sample_count) / full_scale
+        peak = peak / full_scale
+        total_energy = band_energies.sum()
+        return {
+            "RMS": round(float(rms), 6),
+            "RMS_dBFS": round(float(20 * np.log10(rms)), 2) if rms > 0 else None,
+            "Peak": round(peak, 6),
+            "CrestFactor": round(float(peak / rms), 3) if rms > 0 else None,
+            "ClippingRatio": round(clipped / sample_count, 6),
+            "BandEnergies": {
+                f"{low}-{high if high is not None else frame_rate // 2} Hz":
+                    round(float(energy / total_energy), 4) if total_energy > 0 else 0.0
+                for (low, high), energy in zip(FREQUENCY_BANDS, band_energies)
+            },
+        }
+
     def save_audio_metadata_to_json(self, metadata, output_folder):
-        """Save audio metadata to a JSON file."""
+        """Save audio metadata to a JSON file (written to a temporary file, then renamed)."""
         os.makedirs(output_folder, exist_ok=True)           #Création du dossier output
         output_path = os.path.join(output_folder, "audio_metadata.json")
-        with open(output_path, 'w', encoding='utf-8') as json_file:     #Sauvegarde des métadonnées
+        with atomic_open(output_path) as json_file:     #Sauvegarde des métadonnées
             json.dump(metadata, json_file, indent=4, ensure_ascii=False)
         logger.info(f"[Success] Metadata saved to {output_path}")
 
-def process_audio(base_folder):
-    """Process the audio file inside the recordings/ folder."""
+def _load_previous_metadata(output_path):
+    """Returns the metadata already saved for each audio file, keyed by file name."""
+    if not input_exists(output_path):
+        return {}
+    try:
+        with open_input(output_path, 'r', encoding='utf-8') as json_file:
+            previous = json.load(json_file)
+    except (OSError, ValueError):
+        return {}
+    if isinstance(previous, dict):                          #Ancien format : un seul fichier audio
+        previous = [previous]
+    return {metadata.get("FileName"): metadata for metadata in previous}
+
+def process_audio(base_folder, inventory=None):
+    """
+    Process every audio file inside the recordings/ folder: header metadata and signal statistics.
+    Files unchanged since the last run (manifest) keep their previous metadata.
+    The input folder is listed from `inventory` (modules.inventory) when one is given.
+    """
 
     audio = AudioProcessor()
 
     recordings_folder = os.path.join(base_folder, "recordings")
     output_folder = os.path.join(recordings_folder, "output")
+    output_path = os.path.join(output_folder, "audio_metadata.json")
     
-    if not os.path.exists(recordings_folder):
+    if not exists(recordings_folder, inventory):
         logger.warning(" No recordings folder found.")
         return
         
-    audio_files = [f for f in os.listdir(recordings_folder) if f.endswith(".wav")]
+    signatures = scan_inputs(recordings_folder, (".wav",), inventory)
         
-    if not audio_files:
+    if not signatures:
         logger.warning(" No audio files found in recordings/.")
         return
-        
-    audio_path = os.path.join(recordings_folder, audio_files[0])  # Prend le premier fichier trouvé
-    metadata = audio.extract_audio_metadata(audio_path)
-    audio.save_audio_metadata_to_json(metadata, output_folder)
+
+    manifest = load_manifest(output_folder)
+    reusable = {audio_file: metadata for audio_file, metadata in _load_previous_metadata(output_path).items()
+                if audio_file in signatures and manifest.get(audio_file) == signatures[audio_file]
+                and "SignalStatistics" in metadata}
+    if len(reusable) == len(signatures):
+        logger.info(f"[Skipped] {len(signatures)} audio files unchanged since last run")
+        return
+
+    metadata_list = []
+    for audio_file in sorted(signatures):
+        if audio_file in reusable:
+            metadata_list.append(reusable[audio_file])
+            continue
+
+        audio_path = os.path.join(recordings_folder, audio_file)
+        try:
+            metadata = audio.extract_audio_metadata(audio_path)
+            metadata["SignalStatistics"] = audio.extract_signal_statistics(audio_path)
+        except (wave.Error, EOFError, ValueError, OSError) as e:       # OSError : fichier illisible sur le partage
+            logger.error(f"Error processing {audio_path}: {e}")
+            signatures.pop(audio_file)                      #Sera retraité au prochain passage
+            continue
+        metadata_list.append(metadata)
+
+    audio.save_audio_metadata_to_json(metadata_list, output_folder)
+    save_manifest(output_folder, signatures)
 
 #if __name__ == "__main__":
  #   base_folder = input("Enter the path to the RTE_neg folder: ").strip()
-  #  process_audio(base_folder)
+  #  process_audio(base_folder)
\ No newline at end of file
@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import sqlite3
+import logging
+from itertools import chain
+from modules.inventory import find_missions
+from modules.mission_pack import open_input, input_listdir
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    path TEXT,
+    polarity TEXT,
+    mission_date TEXT,
+    mission_time TEXT
+);
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    mission_id INTEGER NOT NULL REFERENCES missions(id),
+    camera TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    file_size_kb REAL,
+    file_type TEXT,
+    image_size TEXT,
+    site TEXT,
+    localisation TEXT,
+    model TEXT,
+    date_time_original TEXT,
+    humidity REAL,
+    pressure REAL,
+    ambient_temperature REAL,
+    metadata TEXT,
+    UNIQUE (mission_id, camera, file_name)
+);
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    id INTEGER PRIMARY KEY,
+    mission_id INTEGER NOT NULL REFERENCES missions(id),
+    source_file TEXT NOT NULL,
+    timestamp TEXT,
+    unit TEXT,
+    ip TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS diagnostics (
+    id INTEGER PRIMARY KEY,
+    mission_id INTEGER NOT NULL REFERENCES missions(id),
+    source_file TEXT NOT NULL,
+    timestamp TEXT,
+    message TEXT,
+    ip TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS audio (
+    id INTEGER PRIMARY KEY,
+    mission_id INTEGER NOT NULL REFERENCES missions(id),
+    file_name TEXT NOT NULL,
+    channels INTEGER,
+    sample_rate INTEGER,
+    bit_depth INTEGER,
+    duration_s REAL,
+    rms REAL,
+    peak REAL,
+    crest_factor REAL,
+    clipping_ratio REAL,
+    metadata TEXT,
+    UNIQUE (mission_id, file_name)
+);
+CREATE INDEX IF NOT EXISTS idx_missions_date ON missions (mission_date);
+CREATE INDEX IF NOT EXISTS idx_images_date ON images (date_time_original);
+CREATE INDEX IF NOT EXISTS idx_images_camera ON images (camera);
+CREATE INDEX IF NOT EXISTS idx_images_localisation ON images (localisation);
+CREATE INDEX IF NOT EXISTS idx_sensor_timestamp ON sensor_readings (timestamp);
+CREATE INDEX IF NOT EXISTS idx_sensor_ip ON sensor_readings (ip);
+CREATE INDEX IF NOT EXISTS idx_diagnostics_timestamp ON diagnostics (timestamp);
+CREATE INDEX IF NOT EXISTS idx_diagnostics_ip ON diagnostics (ip);
+"""
+
+MISSION_PATTERN = re.compile(r"RTE_mission_(neg|pos)_(\d{4}-\d{2}-\d{2})_(\d{2})_(\d{2})_(\d{2})")
+IP_PATTERN = re.compile(r"\bIP\d+\b")
+IP_COLUMNS = {"ip", "localisation", "inspection_point", "inspectionpoint"}
+
+
+def _number(value):
+    """Converts '45.0 %', '101325.0 Pa', '23.5 °C' or '16000 Hz' to a float (None if impossible)."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).split()[0])
+    except (ValueError, IndexError):
+        return None
+
+
+def _exif_date(value):
+    """Converts an EXIF date '2025:01:14 10:02:33' to the sortable form '2025-01-14 10:02:33'."""
+    if not value or len(value) < 10:
+        return value
+    return value[:10].replace(":", "-") + value[10:]
+
+
+def find_column(record, *keywords):
+    """Returns the value of the first column whose name contains one of the keywords."""
+    for column, value in record.items():
+        if any(keyword in column.lower() for keyword in keywords):
+            return value
+    return None
+
+
+def _find_ip(record):
+    """Returns the inspection point (IPn) of a log record, from a dedicated column or from its text."""
+    for column, value in record.items():
+        if column.lower() in IP_COLUMNS and value:
+            return str(value)
+    match = IP_PATTERN.search(" ".join(str(value) for value in record.values()))
+    return match.group(0) if match else None
+
+
+def iter_json_records(json_path):
+    """Yields the records of a JSON array file, or of an NDJSON file line by line (also from a packed mission)."""
+    with open_input(json_path, "r", encoding="utf-8") as f:
+        if json_path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    yield from data
+
+
+class MetadataCatalog:
+    """Single SQLite database gathering the metadata of every mission."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_mission(self, mission_path):
+        """Registers a mission (or refreshes its path) and returns its id."""
+        name = os.path.basename(os.path.normpath(mission_path))
+        match = MISSION_PATTERN.search(name)
+        polarity, mission_date, mission_time = None, None, None
+        if match:
+            polarity, mission_date = match.group(1), match.group(2)
+            mission_time = ":".join(match.group(3, 4, 5))
+        self.connection.execute(
+            "INSERT INTO missions (name, path, polarity, mission_date, mission_time) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET path = excluded.path",
+            (name, mission_path, polarity, mission_date, mission_time))
+        return self.connection.execute("SELECT id FROM missions WHERE name = ?", (name,)).fetchone()[0]
+
+    def add_images(self, mission_id, camera, metadata_list):
+        """Inserts (or replaces) the metadata of a camera folder."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO images (mission_id, camera, file_name, file_size_kb, file_type, image_size, "
+            "site, localisation, model, date_time_original, humidity, pressure, ambient_temperature, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((mission_id, camera,
+              find_column(metadata, "filename"),
+              metadata.get("Filesize"),
+              metadata.get("FileType"),
+              metadata.get("ImageSize"),
+              metadata.get("Site"),
+              metadata.get("Localisation"),
+              metadata.get("Model"),
+              _exif_date(metadata.get("DateTimeOriginal")),
+              _number(metadata.get("Humidity")),
+              _number(metadata.get("Pressure")),
+              _number(metadata.get("AmbientTemperature")),
+              json.dumps(metadata, ensure_ascii=False))
+             for metadata in metadata_list))
+
+    def add_log_records(self, mission_id, source_file, records):
+        """Replaces the rows of a log file, sorted into sensor_readings or diagnostics by format."""
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return
+        table = "diagnostics" if "Message" in first else "sensor_readings"
+        text_column = "message" if table == "diagnostics" else "unit"
+        text_key = "Message" if table == "diagnostics" else "Unit"
+        self.connection.execute(f"DELETE FROM {table} WHERE mission_id = ? AND source_file = ?",
+                                (mission_id, source_file))
+        self.connection.executemany(
+            f"INSERT INTO {table} (mission_id, source_file, timestamp, {text_column}, ip, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((mission_id, source_file, find_column(record, "time", "date"), record.get(text_key),
+              _find_ip(record), json.dumps(record, ensure_ascii=False))
+             for record in chain([first], records)))
+
+    def add_audio(self, mission_id, metadata):
+        """Inserts (or replaces) the metadata of an audio file, with its signal statistics if present."""
+        statistics = metadata.get("SignalStatistics") or {}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO audio (mission_id, file_name, channels, sample_rate, bit_depth, duration_s, "
+            "rms, peak, crest_factor, clipping_ratio, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (mission_id, metadata.get("FileName"), metadata.get("Channels"),
+             _number(metadata.get("SampleRate")), _number(metadata.get("BitDepth")),
+             _number(metadata.get("Duration")), statistics.get("RMS"), statistics.get("Peak"),
+             statistics.get("CrestFactor"), statistics.get("ClippingRatio"),
+             json.dumps(metadata, ensure_ascii=False)))
+
+    def import_mission(self, mission_path):
+        """Imports the JSON outputs already written in a mission's output folders (on disk or in its pack)."""
+        mission_id = self.add_mission(mission_path)
+        output_folders = {
+            "images": os.path.join(mission_path, "images", "output"),
+            "logs": os.path.join(mission_path, "logs", "output"),
+            "recordings": os.path.join(mission_path, "recordings", "output"),
+        }
+        for kind, output_folder in output_folders.items():
+            for file in input_listdir(output_folder):
+                if not file.endswith((".json", ".ndjson")) or file == "manifest.json":
+                    continue
+                json_path = os.path.join(output_folder, file)
+                try:
+                    if kind == "images":
+                        self.add_images(mission_id, os.path.splitext(file)[0], iter_json_records(json_path))
+                    elif kind == "logs":
+                        self.add_log_records(mission_id, file, iter_json_records(json_path))
+                    else:
+                        for metadata in iter_json_records(json_path):
+                            self.add_audio(mission_id, metadata)
+                except (OSError, ValueError) as e:
+                    logger.error(f" Error importing {json_path}: {e}")
+        self.connection.commit()
+        logger.info(f"[Success] Mission imported into catalog: {mission_path}")
+
+
+def import_existing_outputs(root, db_path):
+    """Bulk-imports the JSON outputs of every mission found below root into the catalog."""
+    missions = find_missions(root)
+    with MetadataCatalog(db_path) as catalog:
+        for mission_path in missions:
+            catalog.import_mission(mission_path)
+    logger.info(f"[Success] {len(missions)} missions imported into {db_path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    root = input("Enter the path of the folder containing the missions to import: ").strip()
+    db_path = input("Enter the path of the SQLite catalog: ").strip()
+    import_existing_outputs(root, db_path)
@@ -0,0 +1,174 @@
+import os
+import json
+import logging
+import numpy as np
+from PIL import Image
+from modules.inventory import scan_tree
+from modules.catalog import find_column, iter_json_records
+from modules.json_writer import atomic_open
+from modules.manifest import MANIFEST_NAME
+from modules.pixel_stats import read_reduced
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8                   # Empreinte de HASH_SIZE x HASH_SIZE bits (64 bits)
+HASH_DECODE_SIZE = (64, 64)     # Décodage réduit suffisant pour l'empreinte (1/8 de la taille pour les JPEG)
+MAX_DISTANCE = 6                # Nombre de bits différents jusqu'auquel deux images sont des quasi-doublons
+DUPLICATE_REPORT = "rapport_doublons.json"
+
+
+def dhash_array(pixels, hash_size=HASH_SIZE):
+    """
+    Difference hash of a 2-D uint8 array: the image is shrunk to (hash_size + 1) x hash_size and each bit
+    tells whether a pixel is brighter than its right neighbour. Returned as a hexadecimal string.
+    """
+    small = np.asarray(Image.fromarray(pixels).resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return bits.tobytes().hex()
+
+
+def dhash(source, hash_size=HASH_SIZE):
+    """Difference hash of an image (path or binary file object), from a reduced-scale decode."""
+    return dhash_array(read_reduced(source, HASH_DECODE_SIZE), hash_size)
+
+
+def hamming(a, b):
+    """Number of differing bits between two integer hashes."""
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with the Hamming distance. A lookup within `max_distance`
+    only visits the children whose edge distance is within max_distance of the query's distance to the node
+    (triangle inequality), instead of comparing the query with every stored hash.
+    """
+
+    def __init__(self):
+        self.root = None            # [hash, éléments de même empreinte, {distance: enfant}]
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """Returns [(distance, item)] for every stored hash within max_distance of value."""
+        found = []
+        pending = [self.root] if self.root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    pending.append(child)
+        return found
+
+
+def _is_image_output(path):
+    """Tells whether a file is the metadata output of a camera: <mission>/images/output/<camera>.json or .ndjson."""
+    output_folder = os.path.dirname(path)
+    return (path.endswith((".json", ".ndjson")) and os.path.basename(path) != MANIFEST_NAME
+            and os.path.basename(output_folder) == "output"
+            and os.path.basename(os.path.dirname(output_folder)) == "images")
+
+
+def iter_hashed_images(root, inventory=None):
+    """
+    Yields (path, size in bytes, hash) for every image whose metadata record holds a PerceptualHash
+    (modules.image_metadata) below root, packed missions included.
+    The tree is listed from `inventory` (modules.inventory) when one is given.
+    """
+    if inventory is None:
+        inventory = scan_tree(root)
+    outputs = sorted(entry.path for _, entry in inventory.iter_files(root) if _is_image_output(entry.path))
+    for json_path in outputs:
+        images_path = os.path.dirname(os.path.dirname(json_path))                  # <mission>/images
+        camera = os.path.splitext(os.path.basename(json_path))[0]
+        try:
+            for record in iter_json_records(json_path):
+                if record.get("PerceptualHash"):
+                    yield (os.path.join(images_path, camera, find_column(record, "filename")),
+                           round(record["Filesize"] * 1024), record["PerceptualHash"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f" Error reading {json_path}: {e}")
+
+
+def find_clusters(images, max_distance=MAX_DISTANCE):
+    """
+    Groups images (path, size, hex hash) whose hashes are within max_distance of each other, transitively.
+    Returns the clusters of two images or more.
+    """
+    tree = BKTree()
+    for index, (_, _, value) in enumerate(images):
+        tree.add(int(value, 16), index)
+
+    parents = list(range(len(images)))
+
+    def find(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for index, (_, _, value) in enumerate(images):
+        for _, other in tree.search(int(value, 16), max_distance):
+            parents[find(other)] = find(index)
+
+    clusters = {}
+    for index in range(len(images)):
+        clusters.setdefault(find(index), []).append(images[index])
+    return [cluster for cluster in clusters.values() if len(cluster) > 1]
+
+
+def duplicate_report(root, max_distance=MAX_DISTANCE, report_path=DUPLICATE_REPORT, inventory=None):
+    """
+    Finds the near-duplicate clusters among every hashed image below root (one mission or the whole archive)
+    and writes them to report_path, largest reclaimable space first. In each cluster the largest file is kept,
+    the space of the others is counted as reclaimable.
+    """
+    images = list(iter_hashed_images(root, inventory))
+    clusters = []
+    for cluster in find_clusters(images, max_distance):
+        cluster.sort(key=lambda image: (-image[1], image[0]))
+        clusters.append({
+            "keep": cluster[0][0],
+            "duplicates": [{"path": path, "bytes": size, "hash": value} for path, size, value in cluster[1:]],
+            "reclaimable_bytes": sum(size for _, size, _ in cluster[1:]),
+        })
+    clusters.sort(key=lambda cluster: cluster["reclaimable_bytes"], reverse=True)
+    report = {
+        "root": os.path.abspath(root),
+        "max_distance": max_distance,
+        "images_hashed": len(images),
+        "clusters": len(clusters),
+        "duplicate_images": sum(len(cluster["duplicates"]) for cluster in clusters),
+        "reclaimable_mb": round(sum(cluster["reclaimable_bytes"] for cluster in clusters) / (1024 * 1024), 2),
+        "duplicates": clusters,
+    }
+    with atomic_open(report_path) as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"[Success] {report['clusters']} groupes de quasi-doublons parmi {len(images)} images, "
+                f"{report['reclaimable_mb']} Mo récupérables. Rapport : {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    root_folder = input("Enter the path of a mission, month or archive folder: ").strip()
+    duplicate_report(root_folder)
@@ -1,100 +1,251 @@
 import os
+import io
 import json
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
-from PIL.ExifTags import TAGS
 import logging
+from modules.jpeg_header import EXIF_TAGS, read_jpeg_header
+from modules.manifest import load_manifest, save_manifest, scan_inputs, is_up_to_date
+from modules.inventory import exists, isdir, listdir
+from modules.timing import timed, parent_folder
+from modules.json_writer import JsonStreamWriter, JSON_EXTENSIONS, atomic_open
+from modules.timing import record_call
+from modules.pixel_stats import read_reduced, batch_statistics
+from modules.mission_pack import open_input, input_size
+from modules.image_hash import dhash
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+OUTPUT_FORMAT = "json"      # "json" : format indenté habituel (toute la caméra gardée en mémoire), (Modifiez ici)
+                            # "compact" : tableau JSON compact écrit au fil de l'eau, "ndjson" : un objet par ligne
+PERCEPTUAL_HASH = True      # Empreinte (dHash) de chaque image, pour la recherche de quasi-doublons (Modifiez ici)
+PIXEL_STATS = False         # True : statistiques d'intensité des pixels pour les caméras ci-dessous (Modifiez ici)
+PIXEL_STATS_CAMERAS = ("radiometric_camera", "uv_camera")
+PIXEL_BATCH_SIZE = 32       # Images envoyées ensemble à un processus et traitées en un seul lot NumPy
+NB_PROCESSUS_PIXELS = 2     # Processus dédiés aux statistiques de pixels (par mission)
+
 class ImageMetadata:
+    def __init__(self, perceptual_hash=PERCEPTUAL_HASH):
+        self.perceptual_hash = perceptual_hash
+
+    @timed("images", path_arg=1, group=parent_folder)
     def extract_metadata(self, image_path):
-        """Extracts metadata from an image."""
+        """Extracts metadata from an image (on disk or in a packed mission)."""
         try:
-            img = Image.open(image_path)
-            exif_data = img._getexif()
-                                            #Structure des métadonnées
-            metadata = {
-                "metadata obligatoire : "
-                "FileName": os.path.basename(image_path),
-                "Folder": os.path.dirname(image_path),
-                "Filesize": round(os.path.getsize(image_path) / 1024, 2),  # KB
-                "FileType": img.format,
-                "FileTypeExtension": os.path.splitext(image_path)[1].upper(),
-                "ImageSize": f"{img.size[0]}x{img.size[1]}",
-                "DomaineActif": "station de conversion",
-                "MoyenAcquisition": "Robot",
-                "Prestataire": "Ross-Robotics",     #Modifiez ici certaines données pour la visualisation sur le json final
-                "ModèleRobot": "MK4.2",
-                "CM": "Toulouse",
-                "GMR": "LARO",
-                "GDP": "AUDE PO",
-                "Site": "BAIXAS",
-                "Localisation": os.path.basename(image_path).split("_")[0],
-                "IdentifiantRéf-PosteElectrique": None,
-            }
-                                            #Extraction des métadonnées            
-            if exif_data:
-                for tag, value in exif_data.items():
-                    tag_name = TAGS.get(tag, tag)
-                    if tag_name == "Model":
-                        metadata["Model"] = value
-                    elif tag_name == "DateTimeOriginal":
-                        metadata["DateTimeOriginal"] = value
-                    elif tag_name == "ResolutionUnit":
-                        metadata["ResolutionUnit"] = value
-                    elif tag_name == "Humidity":
-                        metadata["Humidity"] = f"{float(value)} %"
-                    elif tag_name == "Pressure":
-                        metadata["Pressure"] = f"{float(value)} Pa"
-                    elif tag_name == "AmbientTemperature":
-                        metadata["AmbientTemperature"] = f"{float(value)} °C"
-            return metadata
-        
+            with open_input(image_path) as source:
+                return self._describe(image_path, source)
         except Exception as e:
             logger.error(f"Error processing {image_path}: {e}")
             return None
 
+    def extract_metadata_and_pixels(self, image_path):
+        """
+        Reads the file once and returns its metadata and its pixels decoded at reduced scale (modules.pixel_stats).
+        Errors are raised, not logged, since this runs in worker processes.
+        """
+        with open_input(image_path) as f:
+            source = io.BytesIO(f.read())
+        metadata = self._describe(image_path, source)
+        source.seek(0)
+        return metadata, read_reduced(source)
+
+    def _describe(self, image_path, source=None):
+        """Builds the metadata of an image, read from `source` (an open binary file, or its content in memory) if given."""
+        header = None
+        if image_path.lower().endswith((".jpg", ".jpeg")):
+            header = read_jpeg_header(source if source is not None else image_path)    #Lecture rapide de l'en-tête JPEG uniquement
+
+        if header is not None:
+            width, height, exif_tags = header
+            file_type = "JPEG"
+        else:                                           #PIL pour les PNG et les fichiers atypiques
+            if source is not None:
+                source.seek(0)
+            with Image.open(source if source is not None else image_path) as img:
+                exif_data = img._getexif() if hasattr(img, "_getexif") else None
+                file_type = img.format
+                width, height = img.size
+            exif_tags = {name: exif_data[tag] for tag, name in EXIF_TAGS.items()
+                         if exif_data and tag in exif_data}
+                                        #Structure des métadonnées
+        metadata = {
+            "metadata obligatoire : "
+            "FileName": os.path.basename(image_path),
+            "Folder": os.path.dirname(image_path),
+            "Filesize": round((source.getbuffer().nbytes if isinstance(source, io.BytesIO) else input_size(image_path)) / 1024, 2),  # KB
+            "FileType": file_type,
+            "FileTypeExtension": os.path.splitext(image_path)[1].upper(),
+            "ImageSize": f"{width}x{height}",
+            "DomaineActif": "station de conversion",
+            "MoyenAcquisition": "Robot",
+            "Prestataire": "Ross-Robotics",     #Modifiez ici certaines données pour la visualisation sur le json final
+            "ModèleRobot": "MK4.2",
+            "CM": "Toulouse",
+            "GMR": "LARO",
+            "GDP": "AUDE PO",
+            "Site": "BAIXAS",
+            "Localisation": os.path.basename(image_path).split("_")[0],
+            "IdentifiantRéf-PosteElectrique": None,
+        }
+                                        #Extraction des métadonnées
+        for tag_name in EXIF_TAGS.values():
+            if tag_name not in exif_tags:
+                continue
+            value = exif_tags[tag_name]
+            if tag_name == "Humidity":
+                metadata["Humidity"] = f"{float(value)} %"
+            elif tag_name == "Pressure":
+                metadata["Pressure"] = f"{float(value)} Pa"
+            elif tag_name == "AmbientTemperature":
+                metadata["AmbientTemperature"] = f"{float(value)} °C"
+            else:
+                metadata[tag_name] = value
+        if self.perceptual_hash:                #Empreinte calculée sur un décodage réduit de l'image source
+            if source is not None:
+                source.seek(0)
+            metadata["PerceptualHash"] = dhash(source if source is not None else image_path)
+        return metadata
+
     def save_metadata_to_json(self, metadata_list, output_path):
-        """Saves extracted metadata to a JSON file."""
+        """Saves extracted metadata to a JSON file (written to a temporary file, then renamed)."""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)        #Création du dossier output 
-        with open(output_path, "w", encoding="utf-8") as json_file:
+        with atomic_open(output_path) as json_file:
             json.dump(metadata_list, json_file, indent=4, ensure_ascii=False)   #Sauvegarde des données JSON
 
 
-def process_images_in_folder(base_path):
-    """Processes images in subfolders of the 'images' folder."""
+def _extract_batch_with_pixels(image_paths, perceptual_hash=PERCEPTUAL_HASH):
+    """
+    Worker process: extracts the metadata of a batch of images, each file being read once, and adds the
+    pixel statistics computed in a single NumPy batch. Returns (metadata or None, error, seconds, bytes) per image.
+    """
+    image = ImageMetadata(perceptual_hash)
+    results = []
+    arrays = []
+    for image_path in image_paths:
+        start = perf_counter()
+        try:
+            metadata, pixels = image.extract_metadata_and_pixels(image_path)
+        except Exception as e:
+            results.append((None, f"Error processing {image_path}: {e}", perf_counter() - start, 0))
+            continue
+        arrays.append(pixels)
+        results.append((metadata, None, perf_counter() - start, round(metadata["Filesize"] * 1024)))
+
+    start = perf_counter()
+    statistics = iter(batch_statistics(arrays))
+    share = (perf_counter() - start) / max(1, len(arrays))     # Temps du lot réparti sur ses images
+    completed = []
+    for metadata, error, seconds, nbytes in results:
+        if metadata is not None:
+            metadata["PixelStatistics"] = next(statistics)
+            seconds += share
+        completed.append((metadata, error, seconds, nbytes))
+    return completed
+
+def _iter_metadata_with_pixels(image_paths, executor, perceptual_hash=PERCEPTUAL_HASH):
+    """Yields the metadata (with PixelStatistics) of the images in order, batches being processed by `executor`."""
+    batches = [image_paths[i:i + PIXEL_BATCH_SIZE] for i in range(0, len(image_paths), PIXEL_BATCH_SIZE)]
+    results_per_batch = executor.map(_extract_batch_with_pixels, batches, [perceptual_hash] * len(batches))
+    for batch, results in zip(batches, results_per_batch):
+        for image_path, (metadata, error, seconds, nbytes) in zip(batch, results):
+            record_call("images", "extract_metadata_and_pixels", seconds, nbytes, parent_folder(image_path))
+            if error:
+                logger.error(error)
+            yield metadata
+
+def _write_camera_metadata(image, folder_path, filenames, json_output_path, output_format, executor=None):
+    """
+    Extracts the images of a camera folder into its JSON output and returns (records written, images in error).
+    With an `executor`, pixel statistics are computed too, in that process pool.
+    """
+    paths = [os.path.join(folder_path, filename) for filename in filenames
+             if filename.lower().endswith(IMAGE_EXTENSIONS)]
+    if executor is not None:
+        extracted = _iter_metadata_with_pixels(paths, executor, image.perceptual_hash)
+    else:
+        extracted = map(image.extract_metadata, paths)
+
+    if output_format == "json":
+        metadata_list = [metadata for metadata in extracted if metadata]
+        if metadata_list:
+            image.save_metadata_to_json(metadata_list, json_output_path)
+        return len(metadata_list), len(paths) - len(metadata_list)
+
+    # Chaque enregistrement est écrit dès son extraction, dans un fichier temporaire renommé à la fin
+    with JsonStreamWriter(json_output_path, ndjson=output_format == "ndjson") as writer:
+        for metadata in extracted:
+            if metadata:
+                writer.write(metadata)
+        if writer.count == 0:
+            writer.discard()
+    return writer.count, len(paths) - writer.count
+
+def process_images_in_folder(base_path, inventory=None, output_format=OUTPUT_FORMAT, pixel_stats=PIXEL_STATS,
+                             perceptual_hash=PERCEPTUAL_HASH):
+    """
+    Processes images in subfolders of the 'images' folder.
+    Camera folders whose images are unchanged since the last run (manifest) are skipped.
+    The input folders are listed from `inventory` (modules.inventory) when one is given.
+    output_format: "json" (indented, the default), or "compact" and "ndjson" which stream each record to disk
+    as soon as it is extracted; any other value raises ValueError.
+    pixel_stats=True adds intensity statistics (modules.pixel_stats) to the images of PIXEL_STATS_CAMERAS.
+    perceptual_hash=True adds the difference hash of each image (PerceptualHash), read by modules.image_hash.
+    """
+    if output_format not in JSON_EXTENSIONS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of: {', '.join(JSON_EXTENSIONS)}")
 
-    image = ImageMetadata()
+    image = ImageMetadata(perceptual_hash)
 
     images_path = os.path.join(base_path, "images")
     output_path = os.path.join(images_path, "output")
         
-    if not os.path.exists(images_path):
+    if not exists(images_path, inventory):
         logger.warning("No 'images' folder found.")
         return
-    
-    if os.path.exists(output_path):
-        logger.warning("Output folder already exists. Process aborted.")
-        return
+
+    manifest = load_manifest(output_path)
+    previous_manifest = dict(manifest)
+    camera_folders = set()
+    executor = None                 # Pool des statistiques de pixels, créé seulement si nécessaire
         
-    for folder in os.listdir(images_path):              #Vérification des sous dossiers dans 'images' donc les dossiers front_camera, optical_camera....
-        folder_path = os.path.join(images_path, folder)
-        if os.path.isdir(folder_path):
-            metadata_list = []
-                
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-                if file_path.lower().endswith((".jpg", ".jpeg", ".png")):
-                    metadata = image.extract_metadata(file_path)
-                    if metadata:
-                        metadata_list.append(metadata)
-                
-            if metadata_list:                              #Enregistrement des métadonnées
-                json_output_path = os.path.join(output_path, f"{folder}.json")
-                image.save_metadata_to_json(metadata_list, json_output_path)
-                logger.info(f"[Success] Metadata saved: {json_output_path}")
-            else:
-                logger.warning(f" No images found in {folder}")
+    try:
+        for folder in listdir(images_path, inventory):              #Vérification des sous dossiers dans 'images' donc les dossiers front_camera, optical_camera....
+            folder_path = os.path.join(images_path, folder)
+            if isdir(folder_path, inventory) and folder != "output":
+                camera_folders.add(folder)
+                json_output_path = os.path.join(output_path, f"{folder}{JSON_EXTENSIONS[output_format]}")
+                signature = scan_inputs(folder_path, IMAGE_EXTENSIONS, inventory)
+                with_pixels = pixel_stats and folder in PIXEL_STATS_CAMERAS
+                if with_pixels:
+                    signature["PixelStatistics"] = True     # Activer ou désactiver l'option retraite la caméra
+                if perceptual_hash:
+                    signature["PerceptualHash"] = True
+                if is_up_to_date(manifest, folder, signature, json_output_path):
+                    logger.info(f"[Skipped] {folder} unchanged since last run")
+                    continue
+
+                if with_pixels and executor is None:
+                    executor = ProcessPoolExecutor(max_workers=NB_PROCESSUS_PIXELS)
+                written, failed = _write_camera_metadata(image, folder_path, listdir(folder_path, inventory),
+                                                         json_output_path, output_format,
+                                                         executor if with_pixels else None)
+                    
+                if written:                                    #Enregistrement des métadonnées
+                    if not failed:                             #Caméra retraitée au prochain passage sinon
+                        manifest[folder] = signature
+                    logger.info(f"[Success] Metadata saved: {json_output_path}")
+                else:
+                    logger.warning(f" No images found in {folder}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for folder in set(manifest) - camera_folders:       #Dossiers caméra supprimés depuis le dernier passage
+        del manifest[folder]
+    if manifest and manifest != previous_manifest:
+        save_manifest(output_path, manifest)
 
 if __name__ == "__main__":
     base_folder = input("Enter the path to the RTE_neg folder: ").strip()
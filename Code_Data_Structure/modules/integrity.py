@@ -0,0 +1,169 @@
+import os
+import json
+import struct
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.json_writer import atomic_open
+from modules.mission_pack import open_input, input_size
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024        # Taille des blocs lus pour les sommes de contrôle
+NB_THREADS = 8
+JPEG_TAIL_SIZE = 64 * 1024      # Fin d'un JPEG où chercher le marqueur EOI (données constructeur ajoutées après)
+
+
+def hash_file(file_path, chunk_size=CHUNK_SIZE):
+    """Returns the SHA-256 of a file (or of a member of a packed mission), read in chunks."""
+    digest = hashlib.sha256()
+    with open_input(file_path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """SHA-256 cache keyed by path and invalidated by (size, mtime): unchanged files are never hashed again."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f" Unreadable hash cache {cache_path}, starting from scratch: {e}")
+
+    def checksum(self, file_path, size=None, mtime=None):
+        """Returns (sha256, from_cache) for a file, hashing it only if its size or mtime changed."""
+        if size is None or mtime is None:
+            stat = os.stat(file_path)
+            size, mtime = stat.st_size, stat.st_mtime
+        key = os.path.abspath(file_path)
+        entry = self.entries.get(key)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["sha256"], True
+        sha256 = hash_file(file_path)
+        with self.lock:
+            self.entries[key] = {"size": size, "mtime": mtime, "sha256": sha256}
+        return sha256, False
+
+    def save(self):
+        with self.lock:
+            with atomic_open(self.cache_path) as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+
+
+def check_jpeg(f, size):
+    """
+    A complete JPEG contains its EOI marker (FFD9) near the end: some cameras append padding or vendor data
+    after it, so the marker is searched in the last JPEG_TAIL_SIZE bytes instead of at the very end.
+    """
+    f.seek(max(0, size - JPEG_TAIL_SIZE))
+    if b"\xff\xd9" not in f.read():
+        return "missing JPEG EOI marker"
+    return None
+
+
+def check_wav(f, size):
+    """The RIFF length of a complete WAV matches the file size (8-byte header, optional pad byte)."""
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return "invalid RIFF header"
+    (riff_size,) = struct.unpack("<I", header[4:8])
+    if riff_size + 8 > size:
+        return f"RIFF length {riff_size + 8} bytes but file is {size} bytes"
+    if riff_size + 8 < size - 1:
+        return f"{size - riff_size - 8} unexpected bytes after the RIFF chunk"
+    return None
+
+
+def check_csv(f, size):
+    """A complete CSV ends with a line break."""
+    f.seek(size - 1)
+    if f.read(1) not in (b"\n", b"\r"):
+        return "last CSV line is incomplete"
+    return None
+
+
+STRUCTURE_CHECKS = {
+    ".jpg": check_jpeg,
+    ".jpeg": check_jpeg,
+    ".wav": check_wav,
+    ".csv": check_csv,
+}
+
+
+def check_structure(file_path, size=None):
+    """Cheap truncation check based on the file format. Returns the problem found, or None."""
+    check = STRUCTURE_CHECKS.get(os.path.splitext(file_path)[1].lower())
+    if check is None:
+        return None
+    if size is None:
+        size = input_size(file_path)
+    if size == 0:
+        return "empty file"
+    with open_input(file_path) as f:
+        return check(f, size)
+
+
+def _iter_files(folder, inventory=None):
+    """Yields (path, size, mtime) for every file below folder, skipping the output folders of main.py."""
+    if inventory is not None:
+        for relative_path, entry in inventory.iter_files(folder):
+            if "output" not in relative_path.split(os.sep)[:-1]:
+                yield entry.path, entry.size, entry.mtime
+        return
+    pending = [folder]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "output":
+                        pending.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+
+def check_integrity(mission_folder, cache=None, workers=NB_THREADS, inventory=None, executor=None):
+    """
+    Checks every file of a mission in a thread pool: structural truncation check, and SHA-256
+    through `cache` if one is given (call cache.save() once the run is over).
+    The files are listed from `inventory` (modules.inventory) when one is given. Missions checked
+    concurrently should share one `executor`, which then bounds the number of files read at the same time.
+    Returns the truncated files and the checksums.
+    """
+    def check(file_info):
+        path, size, mtime = file_info
+        problem = check_structure(path, size)
+        checksum, cached = cache.checksum(path, size, mtime) if cache else (None, False)
+        return os.path.relpath(path, mission_folder).replace(os.sep, "/"), problem, checksum, cached
+
+    truncated = []
+    checksums = {}
+    hashed = 0
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for relative_path, problem, checksum, cached in executor.map(check, _iter_files(mission_folder, inventory)):
+            if problem:
+                truncated.append({"file": relative_path, "problem": problem})
+            if checksum:
+                checksums[relative_path] = checksum
+                hashed += not cached
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return {
+        "mission": mission_folder,
+        "truncated": sorted(truncated, key=lambda item: item["file"]),
+        "checksums": checksums,
+        "files_hashed": hashed,
+    }
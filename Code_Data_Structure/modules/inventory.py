@@ -0,0 +1,244 @@
+import os
+import logging
+import zipfile
+from collections import namedtuple
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from modules.mission_pack import MISSION_PREFIX, PACK_EXTENSION, is_pack, mission_of, mission_exists, open_pack
+
+logger = logging.getLogger(__name__)
+
+NB_THREADS = 16     # Listings de dossiers lancés en parallèle (la latence réseau domine, pas le CPU)
+
+# Un fichier ou un dossier de l'inventaire ; children est un tuple vide pour les fichiers
+Entry = namedtuple("Entry", ["name", "path", "is_dir", "size", "mtime", "children"])
+
+
+def _pack_children(pack_path, mission_path):
+    """Entries of a packed mission (modules.mission_pack), built from the pack's index instead of the disk."""
+    tree = {}
+    for name, size, mtime in open_pack(pack_path).files():
+        *folders, filename = name.split("/")
+        node = tree
+        for folder in folders:
+            node = node.setdefault(folder, {})
+        node[filename] = (size, mtime)
+    pack_mtime = os.path.getmtime(pack_path)
+
+    def build(node, path):
+        children = []
+        for name, value in node.items():
+            child_path = os.path.join(path, name)
+            if isinstance(value, dict):
+                children.append(Entry(name, child_path, True, 0, pack_mtime, build(value, child_path)))
+            else:
+                children.append(Entry(name, child_path, False, value[0], value[1], ()))
+        return tuple(sorted(children, key=lambda child: child.name))
+
+    return build(tree, mission_path)
+
+
+def _merge(children, others):
+    """Merges two lists of Entries of the same folder; `others` wins, folders present in both are merged."""
+    by_name = {child.name: child for child in children}
+    for other in others:
+        mine = by_name.get(other.name)
+        if mine is not None and mine.is_dir and other.is_dir:
+            other = other._replace(children=_merge(mine.children, other.children))
+        by_name[other.name] = other
+    return tuple(sorted(by_name.values(), key=lambda child: child.name))
+
+
+def _list_dir(path):
+    """
+    Lists one folder with os.scandir, keeping the stat data of each entry.
+    A packed mission (RTE_mission_*.zip) is listed as its mission folder, with the content of the pack.
+    """
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append((entry.name, entry.path, entry.stat(follow_symlinks=False).st_mtime))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    if is_pack(entry.name):
+                        try:
+                            files.append(Entry(mission_of(entry.name), mission_of(entry.path), True, 0, stat.st_mtime,
+                                               _pack_children(entry.path, mission_of(entry.path))))
+                            continue
+                        except (OSError, ValueError, zipfile.BadZipFile) as e:
+                            logger.warning(f" Unreadable mission pack {entry.path}: {e}")
+                    files.append(Entry(entry.name, entry.path, False, stat.st_size, stat.st_mtime, ()))
+    except OSError as e:
+        logger.warning(f" Cannot list {path}: {e}")
+    return path, files, dirs
+
+
+class Inventory:
+    """
+    Immutable snapshot of a directory tree, with the size and mtime of every entry.
+    Offers the os-like queries used by the scripts (listdir, isdir, exists, walk) without touching the disk.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        index = {}
+        pending = [root]
+        while pending:
+            entry = pending.pop()
+            index[os.path.normcase(os.path.normpath(entry.path))] = entry
+            pending.extend(entry.children)
+        self._index = MappingProxyType(index)
+
+    def __reduce__(self):
+        # Seul l'arbre est transmis aux processus, l'index est reconstruit à la réception
+        return Inventory, (self.root,)
+
+    def find(self, path):
+        """Returns the Entry of a path, or None if it is not in the inventory."""
+        return self._index.get(os.path.normcase(os.path.normpath(path)))
+
+    def exists(self, path):
+        return self.find(path) is not None
+
+    def isdir(self, path):
+        entry = self.find(path)
+        return entry is not None and entry.is_dir
+
+    def listdir(self, path):
+        """Same as os.listdir, from the snapshot."""
+        entry = self.find(path)
+        if entry is None or not entry.is_dir:
+            raise FileNotFoundError(f"Not a directory in the inventory: {path}")
+        return [child.name for child in entry.children]
+
+    def entries(self, path):
+        """Returns the child Entries of a folder (empty if the folder is unknown)."""
+        entry = self.find(path)
+        return entry.children if entry is not None and entry.is_dir else ()
+
+    def walk(self, path):
+        """Same as os.walk (top-down), from the snapshot."""
+        entry = self.find(path)
+        if entry is None or not entry.is_dir:
+            return
+        pending = [entry]
+        while pending:
+            current = pending.pop()
+            dirs = [child for child in current.children if child.is_dir]
+            yield current.path, [child.name for child in dirs], \
+                [child.name for child in current.children if not child.is_dir]
+            pending.extend(reversed(dirs))
+
+    def iter_files(self, path):
+        """Yields (relative path, Entry) for every file below path."""
+        entry = self.find(path)
+        if entry is None or not entry.is_dir:
+            return
+        pending = [("", entry)]
+        while pending:
+            relative_dir, current = pending.pop()
+            for child in current.children:
+                relative_path = os.path.join(relative_dir, child.name) if relative_dir else child.name
+                if child.is_dir:
+                    pending.append((relative_path, child))
+                else:
+                    yield relative_path, child
+
+    def subtree(self, path):
+        """Returns the inventory of a sub-folder (e.g. one mission, to send to a worker process)."""
+        entry = self.find(path)
+        if entry is None or not entry.is_dir:
+            raise FileNotFoundError(f"Not a directory in the inventory: {path}")
+        return Inventory(entry)
+
+
+def scan_tree(root, workers=NB_THREADS):
+    """
+    Crawls a tree once, listing its folders concurrently (week, mission and camera folders fan out),
+    and returns an immutable Inventory reusable by every stage of the run.
+    Packed missions are part of the tree as folders; `root` may itself be a packed mission (folder or .zip path).
+    """
+    if is_pack(os.path.basename(root)) and os.path.isfile(root):
+        root = mission_of(root)
+    pack_path = os.path.normpath(root) + PACK_EXTENSION
+    packed = _pack_children(pack_path, root) if is_pack(os.path.basename(pack_path)) \
+        and os.path.isfile(pack_path) else None
+    if packed is not None and not os.path.isdir(root):
+        return Inventory(Entry(os.path.basename(os.path.normpath(root)), root, True, 0,
+                               os.path.getmtime(pack_path), packed))
+
+    listings = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_list_dir, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, files, dirs = future.result()
+                listings[path] = (files, dirs)
+                pending.update(executor.submit(_list_dir, dir_path) for _, dir_path, _ in dirs)
+
+    def build(name, path, mtime):
+        files, dirs = listings[path]
+        # Un dossier à côté du pack de même nom (sorties écrites depuis le pack) est fusionné avec le pack
+        return Entry(name, path, True, 0, mtime, _merge(files, [build(*d) for d in dirs]))
+
+    tree = build(os.path.basename(os.path.normpath(root)), root, os.stat(root).st_mtime)
+    return Inventory(tree if packed is None else tree._replace(children=_merge(packed, tree.children)))
+
+
+# --- Requêtes utilisées par les scripts, avec repli sur os quand aucun inventaire n'est fourni ---
+
+def listdir(path, inventory=None):
+    return inventory.listdir(path) if inventory is not None else os.listdir(path)
+
+
+def isdir(path, inventory=None):
+    return inventory.isdir(path) if inventory is not None else os.path.isdir(path)
+
+
+def exists(path, inventory=None):
+    return inventory.exists(path) if inventory is not None else os.path.exists(path)
+
+
+def find_missions(root, inventory=None):
+    """
+    Returns every RTE_mission_* below root (a mission, week, month or archive folder), sorted, without
+    descending into the missions. Packed missions are included as their folder path (the pack path without
+    its extension). The tree is read from `inventory` when one is given, where packs are already folders.
+    """
+    name = os.path.basename(os.path.normpath(root))
+    if name.startswith(MISSION_PREFIX):
+        mission = mission_of(root) if is_pack(name) else root
+        if inventory is not None:
+            return [mission] if inventory.isdir(mission) else []
+        return [mission] if mission_exists(mission) else []
+
+    missions = set()
+    if inventory is not None:
+        entry = inventory.find(root)
+        pending = [entry] if entry is not None and entry.is_dir else []
+        while pending:
+            for child in pending.pop().children:
+                if not child.is_dir:
+                    continue
+                if child.name.startswith(MISSION_PREFIX):
+                    missions.add(child.path)
+                else:
+                    pending.append(child)
+        return sorted(missions)
+
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if is_pack(entry.name) and entry.is_file():
+                    missions.add(mission_of(entry.path))
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.name.startswith(MISSION_PREFIX):
+                    missions.add(entry.path)
+                else:
+                    pending.append(entry.path)
+    return sorted(missions)
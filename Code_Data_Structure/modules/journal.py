@@ -0,0 +1,94 @@
+import os
+import json
+import uuid
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _mission_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class RunJournal:
+    """
+    Append-only JSON Lines journal of the runs of main.process_folder: a "start" line per run, then one line
+    per finished (mission, stage) with its status: "done", "partial" (files skipped on errors) or "failed".
+    Each line is flushed and fsynced as soon as it is written, so the journal survives a crash; a line cut by the
+    crash is ignored when it is read back.
+
+    With resume=True, the last run started on the same folder is continued: its "done" stages are skipped,
+    its "partial" and "failed" stages are run again.
+    """
+
+    def __init__(self, path, folder, resume=False):
+        self.path = path
+        self.folder = os.path.abspath(folder)
+        self.done = {}          # mission -> étapes terminées avec succès
+        self.run = self._last_run() if resume else None
+        if self.run is None:
+            if resume:
+                logger.warning(f" No previous run of {self.folder} in {path}, starting from scratch")
+            # Horodatage lisible + identifiant aléatoire : deux exécutions lancées dans la même seconde restent distinctes
+            self.run = f"{datetime.now().isoformat(timespec='seconds')}-{uuid.uuid4().hex[:12]}"
+            self._append({"event": "start", "run": self.run, "folder": self.folder})
+        else:
+            self._load_run()
+            self._append({"event": "resume", "run": self.run, "time": datetime.now().isoformat(timespec="seconds")})
+
+    def _read(self):
+        """Yields the valid lines of the journal (a truncated last line is skipped)."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _last_run(self):
+        run = None
+        for entry in self._read():
+            if entry.get("event") == "start" and entry.get("folder") == self.folder:
+                run = entry["run"]
+        return run
+
+    def _load_run(self):
+        for entry in self._read():
+            if entry.get("run") != self.run or "stage" not in entry:
+                continue
+            stages = self.done.setdefault(entry["mission"], set())
+            if entry["status"] == "done":
+                stages.add(entry["stage"])
+            else:
+                stages.discard(entry["stage"])
+
+    def _append(self, entry):
+        with open(self.path, "a+b") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":          # Ligne coupée par un arrêt brutal : on repart sur une ligne neuve
+                    f.write(b"\n")
+            f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, mission, stage, status="done", error=None):
+        """Appends the outcome of one stage of a mission."""
+        key = _mission_key(mission)
+        entry = {"run": self.run, "mission": key, "stage": stage, "status": status,
+                 "time": datetime.now().isoformat(timespec="seconds")}
+        if error:
+            entry["error"] = error
+        self._append(entry)
+        if status == "done":
+            self.done.setdefault(key, set()).add(stage)
+        else:
+            self.done.get(key, set()).discard(stage)
+
+    def completed(self, mission):
+        """Stages of a mission already completed in this run."""
+        return self.done.get(_mission_key(mission), set())
@@ -0,0 +1,106 @@
+import struct
+
+# Tags EXIF utilisés dans les métadonnées (les autres ne sont jamais décodés)
+EXIF_TAGS = {
+    0x0110: "Model",
+    0x0128: "ResolutionUnit",
+    0x9003: "DateTimeOriginal",
+    0x9400: "AmbientTemperature",
+    0x9401: "Humidity",
+    0x9402: "Pressure",
+}
+
+EXIF_IFD_POINTER = 0x8769
+
+# Marqueurs SOF (Start Of Frame) qui portent les dimensions de l'image
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Taille en octets des types TIFF : BYTE, ASCII, SHORT, LONG, RATIONAL, SBYTE, UNDEFINED, SSHORT, SLONG, SRATIONAL
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8}
+
+
+def _decode_value(data, order, value_type, count, offset):
+    """Decodes a single TIFF tag value (only the types used by EXIF_TAGS)."""
+    raw = data[offset:offset + count * TYPE_SIZES[value_type]]
+    if value_type == 2:
+        return raw.rstrip(b"\x00").decode("latin-1", "replace")
+    if value_type == 3:
+        return struct.unpack_from(order + "H", raw)[0]
+    if value_type in (4, 9):
+        return struct.unpack_from(order + ("L" if value_type == 4 else "l"), raw)[0]
+    if value_type in (5, 10):
+        num, den = struct.unpack_from(order + ("LL" if value_type == 5 else "ll"), raw)
+        return num / den if den else float("nan")
+    return raw
+
+
+def _read_ifd(data, order, ifd_offset, tags):
+    """Reads the wanted tags of one IFD into `tags` and returns the EXIF sub-IFD offset, if any."""
+    exif_offset = None
+    (count,) = struct.unpack_from(order + "H", data, ifd_offset)
+    for i in range(count):
+        entry = ifd_offset + 2 + i * 12
+        tag, value_type, value_count = struct.unpack_from(order + "HHL", data, entry)
+        if tag == EXIF_IFD_POINTER:
+            (exif_offset,) = struct.unpack_from(order + "L", data, entry + 8)
+        elif tag in EXIF_TAGS and value_type in TYPE_SIZES:
+            offset = entry + 8
+            if value_count * TYPE_SIZES[value_type] > 4:
+                (offset,) = struct.unpack_from(order + "L", data, entry + 8)
+            tags[EXIF_TAGS[tag]] = _decode_value(data, order, value_type, value_count, offset)
+    return exif_offset
+
+
+def parse_exif(tiff_data):
+    """Returns {tag name: value} for EXIF_TAGS found in a TIFF-structured EXIF block."""
+    order = {b"II": "<", b"MM": ">"}.get(tiff_data[:2])
+    if order is None:
+        return {}
+    tags = {}
+    (ifd0_offset,) = struct.unpack_from(order + "L", tiff_data, 4)
+    exif_offset = _read_ifd(tiff_data, order, ifd0_offset, tags)
+    if exif_offset:
+        _read_ifd(tiff_data, order, exif_offset, tags)
+    return tags
+
+
+def _read_header(f):
+    if f.read(2) != b"\xff\xd8":            # SOI : ce n'est pas un JPEG
+        return None
+    exif_tags = {}
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:                 # Octets de remplissage entre segments
+            code = f.read(1)[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:   # Marqueurs sans longueur
+            continue
+        if code in (0xD9, 0xDA):            # EOI ou début des données sans SOF
+            return None
+        (length,) = struct.unpack(">H", f.read(2))
+        if code == 0xE1 and not exif_tags:
+            payload = f.read(length - 2)
+            if payload.startswith(b"Exif\x00\x00"):
+                exif_tags = parse_exif(payload[6:])
+        elif code in SOF_MARKERS:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height, exif_tags
+        else:
+            f.seek(length - 2, 1)           # Segment inutile : on le saute sans le lire
+
+def read_jpeg_header(image_path):
+    """
+    Reads only the JPEG header (APP1/EXIF and SOF segments) without decoding the image.
+    `image_path` may also be a binary file object (e.g. a BytesIO of a file already read), read from its start.
+    Returns (width, height, exif_tags) or None if the header cannot be read this way.
+    """
+    try:
+        if hasattr(image_path, "read"):
+            image_path.seek(0)
+            return _read_header(image_path)
+        with open(image_path, "rb") as f:
+            return _read_header(f)
+    except (OSError, IndexError, KeyError, struct.error):
+        return None
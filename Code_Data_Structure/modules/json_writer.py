@@ -0,0 +1,85 @@
+import os
+import json
+from contextlib import contextmanager
+
+try:
+    import orjson        # Encodeur JSON plus rapide, utilisé s'il est installé
+except ImportError:
+    orjson = None
+
+JSON_EXTENSIONS = {"json": ".json", "compact": ".json", "ndjson": ".ndjson"}    # Extension de chaque format de sortie
+
+
+def dumps(record):
+    """Encodes one record as compact UTF-8 JSON bytes (orjson if available, else the json module)."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@contextmanager
+def atomic_open(path, mode="w"):
+    """
+    Opens a temporary file next to `path` that replaces it only when the block ends without error,
+    so an interrupted run never leaves a half-written output (text mode is UTF-8).
+    """
+    temp_path = f"{path}.tmp"
+    f = open(temp_path, mode, encoding=None if "b" in mode else "utf-8")
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.remove(temp_path)
+        raise
+    f.close()
+    os.replace(temp_path, path)
+
+
+class JsonStreamWriter:
+    """
+    Writes records one by one as a compact JSON array (one record per line) or as NDJSON.
+    The data goes to a temporary file next to `output_path`, renamed over it only when the block ends
+    without error: readers never see a half-written file and memory use does not depend on the record count.
+
+        with JsonStreamWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, output_path, ndjson=False):
+        self.output_path = output_path
+        self.ndjson = ndjson
+        self.temp_path = f"{output_path}.tmp"
+        self.count = 0
+        self.discarded = False
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        self.file = open(self.temp_path, "wb")
+        if not self.ndjson:
+            self.file.write(b"[")
+        return self
+
+    def write(self, record):
+        if self.ndjson:
+            self.file.write(dumps(record) + b"\n")
+        else:
+            self.file.write((b",\n" if self.count else b"\n") + dumps(record))
+        self.count += 1
+
+    def discard(self):
+        """Drops the output: the temporary file is deleted and the existing output is left untouched."""
+        self.discarded = True
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if not self.ndjson:
+                self.file.write(b"\n]\n")
+        finally:
+            self.file.close()
+        if exc_type is not None or self.discarded:
+            os.remove(self.temp_path)
+        else:
+            os.replace(self.temp_path, self.output_path)
+        return False
@@ -0,0 +1,119 @@
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+MAX_BYTES = 10 * 1024 * 1024    # Taille d'un fichier de log avant rotation
+BACKUP_COUNT = 5                # Nombre d'anciens fichiers conservés (.1 à .5)
+
+_listener = None
+
+
+def setup_logging(log_file, level=logging.INFO, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, console=True):
+    """
+    Configures the root logger of a script: records are put on an in-memory queue and written to a
+    rotating log file (and the terminal) by a background thread, so the caller never waits on disk or share I/O.
+    Call once from the script entry point; the writer is flushed and stopped at exit (or by stop_logging).
+    """
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.handlers = [QueueHandler(log_queue)]
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Writes the records still queued and stops the background writer (no-op if it is not running)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class LogAggregator(logging.Filter):
+    """
+    Swallows the records up to `level` and counts them by level and [Tag] prefix.
+    With `loggers`, only the records of these loggers (and of their children) are swallowed.
+    """
+
+    def __init__(self, level=logging.INFO, loggers=None):
+        super().__init__()
+        self.level = level
+        self.loggers = tuple(loggers) if loggers is not None else None
+        self.prefixes = tuple(f"{name}." for name in self.loggers) if loggers is not None else None
+        self.counts = Counter()
+        self.examples = {}
+        self.highest = logging.NOTSET
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        if self.loggers is not None and not (record.name in self.loggers or record.name.startswith(self.prefixes)):
+            return True                                       # Logger hors de ceux regroupés
+        if getattr(record, "_aggregator", None) is self:     # Déjà compté par un autre handler
+            return False
+        record._aggregator = self
+        message = str(record.msg)
+        tag = message.split("]", 1)[0] + "]" if message.startswith("[") and "]" in message else ""
+        kind = f"{record.levelname} {tag}".strip()
+        with self.lock:
+            self.counts[kind] += 1
+            self.examples.setdefault(kind, message)
+            self.highest = max(self.highest, record.levelno)
+        return False
+
+    def summary(self, label):
+        """One line replacing every swallowed record, with the first message of each warning kind."""
+        parts = []
+        for kind, count in self.counts.most_common():
+            part = f"{count} {kind}"
+            if not kind.startswith(("DEBUG", "INFO")):
+                part += f" (ex. : {self.examples[kind].strip()})"
+            parts.append(part)
+        return f"{label} : {sum(self.counts.values())} messages regroupés : {', '.join(parts)}"
+
+
+@contextmanager
+def aggregate_logs(label, level=logging.INFO, enabled=True, loggers=None):
+    """
+    Replaces the per-file log lines emitted inside the block (levels up to `level`) by a single summary line
+    logged at the end. Filters the handlers currently attached to the root logger, so every thread is affected:
+    pass `loggers` when other threads keep logging during the block, to aggregate only the mission's loggers.
+    """
+    if not enabled:
+        yield None
+        return
+    aggregator = LogAggregator(level, loggers)
+    handlers = logging.getLogger().handlers[:]
+    for handler in handlers:
+        handler.addFilter(aggregator)
+    try:
+        yield aggregator
+    finally:
+        for handler in handlers:
+            handler.removeFilter(aggregator)
+        if aggregator.counts:
+            logging.getLogger(__name__).log(max(aggregator.highest, logging.INFO), aggregator.summary(label))
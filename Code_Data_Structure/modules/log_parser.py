@@ -1,55 +1,129 @@
 import os
+import csv
 import pandas as pd
 import logging
+from modules.manifest import load_manifest, save_manifest, scan_inputs
+from modules.inventory import exists, isdir, listdir
+from modules.timing import timed
+from modules.sensor_store import SensorStoreWriter, store_path
+from modules.json_writer import atomic_open
+from modules.mission_pack import open_input, input_exists
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 50000      # Nombre de lignes CSV lues par bloc (borne la mémoire utilisée)
+SENSOR_STORE = False    # Modifiez ici : True pour écrire aussi le stockage en colonnes (.npy) des sensor_log
 
-def parse_logs(logs_dir):
+
+def detect_log_type(file_path):
+    """Detects the log format from the CSV header only, without reading the body."""
+    with open_input(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        columns = next(csv.reader(f), [])
+
+    if "Message" in columns:  # Inspection diagnostics
+        return "inspection_diagnostics"
+    if "Unit" in columns:  # Sensor log
+        return "sensor_log"
+    return None
+
+
+@timed("logs")
+def write_json_stream(file_path, json_path, chunksize=CHUNK_SIZE, ndjson=False, on_chunk=None):
+    """
+    Converts a CSV to JSON records chunk by chunk, so that only one chunk is in memory at a time.
+    Writes a JSON array with one record per line, or NDJSON (one record per line, no array) if ndjson=True.
+    on_chunk, if given, is called with each DataFrame chunk (used to fill the columnar store in the same pass).
+    The file is written under a temporary name and renamed once complete. The CSV may be a member of a packed mission.
+    """
+    with open_input(file_path) as csv_file, atomic_open(json_path) as json_file:
+        if not ndjson:
+            json_file.write("[")
+        first = True
+        for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+            if on_chunk is not None:
+                on_chunk(chunk)
+            for record in chunk.to_json(orient="records", lines=True).splitlines():
+                if ndjson:
+                    json_file.write(record + "\n")
+                else:
+                    json_file.write(("\n" if first else ",\n") + record)
+                first = False
+        if not ndjson:
+            json_file.write("\n]\n" if not first else "]\n")
+
+
+def parse_logs(logs_dir, chunksize=CHUNK_SIZE, ndjson=False, inventory=None, sensor_store=SENSOR_STORE):
     """
     Parse log files (CSV) from a folder and save them as JSON in an 'output' folder.
+    CSV files are streamed in chunks of `chunksize` rows; ndjson=True writes .ndjson files instead of JSON arrays.
+    With sensor_store=True, sensor logs are also saved as typed columns (modules.sensor_store) in the same pass.
+    CSV files unchanged since the last run (same size and mtime in the manifest) are skipped; the manifest also
+    keeps the log type of each CSV, so a fully cached run never reads a CSV header.
+    The input folder is listed from `inventory` (modules.inventory) when one is given.
     """
     logs_dir = logs_dir + "/logs"              #Modidication du chemin d'accès aux logs
 
-    if not os.path.exists(logs_dir):
+    if not exists(logs_dir, inventory):
         logger.error(f" Error: The folder '{logs_dir}' does not exist.")
         return
 
-    output_dir = os.path.join(logs_dir, "output")     # Création du dossier output dans logs_dir
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = os.path.join(logs_dir, "output")     # Dossier output dans logs_dir, créé à la première écriture
 
     files_processed = 0
+    files_skipped = 0
+    manifest = load_manifest(output_dir)
+    previous_manifest = dict(manifest)
+    signatures = scan_inputs(logs_dir, (".csv",), inventory)
+    extension = ".ndjson" if ndjson else ".json"
 
-    for file in os.listdir(logs_dir):
+    for file in listdir(logs_dir, inventory):
         file_path = os.path.join(logs_dir, file)
 
-        if file.endswith(".csv"):  # Vérifie que c'est bien un fichier CSV
-            try:
-                df = pd.read_csv(file_path)
+        if os.path.splitext(file)[1].lower() == ".csv":  # Vérifie que c'est bien un fichier CSV (.csv ou .CSV)
+            json_path = os.path.join(output_dir, f"{os.path.splitext(file)[0]}{extension}")
+            column_store = store_path(output_dir, file)
+            # Entrée du manifeste : [taille, date de modification, type de log]
+            entry = manifest.get(file)
+            if entry and entry[:2] == signatures.get(file) and input_exists(json_path):
+                if len(entry) < 3:                              # Ancien manifeste : type relevé une seule fois
+                    manifest[file] = entry = entry[:2] + [detect_log_type(file_path)]
+                if not sensor_store or entry[2] != "sensor_log" or isdir(column_store, inventory):
+                    files_skipped += 1
+                    continue
 
-                # Détection du type de fichier log
-                if "Message" in df.columns:  # Inspection diagnostics
-                    log_type = "inspection_diagnostics"
-                elif "Unit" in df.columns:  # Sensor log
-                    log_type = "sensor_log"
-                else:
+            writer = None
+            try:
+                # Détection du type de fichier log sur l'en-tête seul
+                log_type = detect_log_type(file_path)
+                if log_type is None:
                     logger.warning(f" Skipping unrecognized log format: {file}")
                     continue
 
-                # Génération du nom de fichier JSON
-                json_filename = f"{file.replace('.csv', '')}.json"
-                json_path = os.path.join(output_dir, json_filename)
-
-                # Sauvegarde en JSON
-                df.to_json(json_path, orient="records", indent=4)
+                # Sauvegarde en JSON, bloc par bloc (et en colonnes pour les sensor_log)
+                os.makedirs(output_dir, exist_ok=True)
+                writer = SensorStoreWriter(column_store) if sensor_store and log_type == "sensor_log" else None
+                write_json_stream(file_path, json_path, chunksize, ndjson, on_chunk=writer.add if writer else None)
                 logger.info(f"[Success] Parsed and saved {file} -> {json_path}")
+                if writer is not None:
+                    writer.save()
+                    logger.info(f"[Success] Column store saved for {file} ({writer.rows} rows) -> {column_store}")
 
+                manifest[file] = signatures.get(file) + [log_type]
                 files_processed += 1
 
             except Exception as e:
                 logger.error(f" Error parsing {file}: {e}")
+                if writer is not None:
+                    writer.discard()
+
+    for file in set(manifest) - set(signatures):   # CSV supprimés depuis le dernier passage
+        del manifest[file]
+    if manifest != previous_manifest:           # Rien à réécrire (ni à créer à côté d'une mission archivée) sinon
+        save_manifest(output_dir, manifest)
 
-    if files_processed == 0:
+    if files_skipped:
+        logger.info(f"[Skipped] {files_skipped} unchanged CSV files in {logs_dir}")
+    if files_processed == 0 and files_skipped == 0:
         logger.warning(" No valid CSV files found in the folder.")
 
 #if __name__ == "__main__":
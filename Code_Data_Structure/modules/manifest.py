@@ -0,0 +1,61 @@
+import os
+import json
+import logging
+from modules.json_writer import atomic_open
+from modules.mission_pack import open_input, input_exists
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_signature(file_path):
+    """Returns the (size, mtime) signature of a file as a JSON-friendly list."""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime]
+
+
+def scan_inputs(folder, extensions, inventory=None):
+    """
+    Returns {filename: [size, mtime]} for the files of `folder` ending with one of `extensions`.
+    Uses the stat data of `inventory` (modules.inventory) instead of the disk when one is given.
+    """
+    if inventory is not None:
+        return {entry.name: [entry.size, entry.mtime] for entry in inventory.entries(folder)
+                if not entry.is_dir and entry.name.lower().endswith(extensions)}
+    signatures = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(extensions):
+                stat = entry.stat()
+                signatures[entry.name] = [stat.st_size, stat.st_mtime]
+    return signatures
+
+
+def load_manifest(output_folder):
+    """
+    Loads the manifest of an output folder, or an empty one if it is missing or unreadable
+    (the copy stored in a packed mission is read when there is none on disk).
+    """
+    manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+    if not input_exists(manifest_path):
+        return {}
+    try:
+        with open_input(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f" Unreadable manifest {manifest_path}, everything will be processed again: {e}")
+        return {}
+
+
+def save_manifest(output_folder, manifest):
+    """Saves the manifest of an output folder (atomically: a crash keeps the previous manifest)."""
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+    with atomic_open(manifest_path) as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+
+
+def is_up_to_date(manifest, key, signature, output_path):
+    """True if `key` was processed with the same input signature and its output still exists."""
+    return manifest.get(key) == signature and input_exists(output_path)
@@ -0,0 +1,307 @@
+import io
+import os
+import time
+import struct
+import zipfile
+import logging
+import threading
+from modules.json_writer import atomic_open
+
+logger = logging.getLogger(__name__)
+
+PACK_EXTENSION = ".zip"         # Conteneur d'une mission : zip non compressé, son index (répertoire central) est à la fin
+MISSION_PREFIX = "RTE_mission_"
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")      # En-tête local d'un membre zip (30 octets)
+
+
+def is_pack(name):
+    """True for the file name of a packed mission (RTE_mission_*.zip)."""
+    return name.startswith(MISSION_PREFIX) and name.lower().endswith(PACK_EXTENSION)
+
+
+def mission_of(pack_path):
+    """Returns the mission folder a pack stands for: the pack path without its extension."""
+    return pack_path[:-len(PACK_EXTENSION)]
+
+
+def _member_mtime(info):
+    """Exact mtime saved by pack_mission in the member comment, or the 2-second zip timestamp."""
+    try:
+        return float(info.comment)
+    except ValueError:
+        return time.mktime(info.date_time + (0, 0, -1))
+
+
+class _MemberReader(io.RawIOBase):
+    """Seekable read-only window over the bytes of one stored member, read from the shared pack file."""
+
+    def __init__(self, pack, start, size):
+        self.pack = pack
+        self.start = start
+        self.size = size
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), self.size - self.position))
+        data = self.pack.read_at(self.start + self.position, count)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class MissionPack:
+    """
+    Read-only random access to a packed mission. The index at the end of the zip is read once; each member
+    is then a window over the pack file at its own offset, so nothing is ever extracted. Members are stored
+    uncompressed: a window can be seeked freely and a WAV can be memory-mapped straight from the pack.
+    """
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        self.mission_path = mission_of(pack_path)
+        self.members = {}           # chemin relatif ('/') -> ZipInfo
+        self._offsets = {}
+        self._lock = threading.Lock()   # Un seul descripteur par pack, partagé par les threads des étapes
+        self._file = open(pack_path, "rb")
+        try:
+            with zipfile.ZipFile(self._file) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    if info.compress_type != zipfile.ZIP_STORED:
+                        raise ValueError(f"Compressed member {info.filename} in {pack_path}")
+                    self.members[info.filename] = info
+        except BaseException:
+            self._file.close()
+            raise
+
+    def close(self):
+        self._file.close()
+
+    def files(self):
+        """Yields (relative path with '/', size, mtime) for every member."""
+        for name, info in self.members.items():
+            yield name, info.file_size, _member_mtime(info)
+
+    def read_at(self, position, size):
+        with self._lock:
+            self._file.seek(position)
+            return self._file.read(size)
+
+    def data_offset(self, name):
+        """Offset of a member's first byte in the pack file (read from its local header on first use)."""
+        if name not in self._offsets:
+            info = self.members[name]
+            header = _LOCAL_HEADER.unpack(self.read_at(info.header_offset, _LOCAL_HEADER.size))
+            if header[0] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(f"Bad local header for {name} in {self.pack_path}")
+            self._offsets[name] = info.header_offset + _LOCAL_HEADER.size + header[10] + header[11]
+        return self._offsets[name]
+
+    def open(self, name):
+        """Opens a member as a buffered binary file object."""
+        if name not in self.members:
+            raise FileNotFoundError(f"{name} is not in {self.pack_path}")
+        return io.BufferedReader(_MemberReader(self, self.data_offset(name), self.members[name].file_size))
+
+
+_packs = {}                     # dossier de la mission (normcase) -> MissionPack ouvert dans ce processus
+_unpacked = set()               # dossiers RTE_mission_* (normcase) déjà vus sans pack dans ce processus
+_packs_lock = threading.Lock()
+
+
+def open_pack(pack_path):
+    """Returns the MissionPack of a pack file, opened once per process."""
+    key = os.path.normcase(os.path.abspath(mission_of(pack_path)))
+    with _packs_lock:
+        if key not in _packs:
+            _packs[key] = MissionPack(pack_path)
+        return _packs[key]
+
+
+def close_pack(pack_path):
+    """Closes a pack opened by open_pack (needed before moving or deleting it under Windows)."""
+    with _packs_lock:
+        pack = _packs.pop(os.path.normcase(os.path.abspath(mission_of(pack_path))), None)
+    if pack is not None:
+        pack.close()
+
+
+def find_member(path):
+    """
+    Returns (MissionPack, member name) if `path` lies inside a packed mission, else (None, None).
+    A mission folder found without a pack is remembered while it exists: another process may pack the
+    mission and delete its folder, after which the pack is looked up again.
+    """
+    path = os.path.abspath(path)
+    key = os.path.normcase(path)
+    with _packs_lock:
+        opened = list(_packs.items())
+    for mission_key, pack in opened:
+        if key.startswith(mission_key + os.sep):
+            return pack, os.path.relpath(path, pack.mission_path).replace(os.sep, "/")
+    folder = os.path.dirname(path)
+    while os.path.dirname(folder) != folder:                # Remonte jusqu'au dossier RTE_mission_* du chemin
+        if os.path.basename(folder).startswith(MISSION_PREFIX):
+            if os.path.normcase(folder) in _unpacked:
+                if os.path.isdir(folder):
+                    return None, None
+                with _packs_lock:                           # Dossier supprimé depuis, peut-être archivé
+                    _unpacked.discard(os.path.normcase(folder))
+            if os.path.isfile(folder + PACK_EXTENSION):
+                pack = open_pack(folder + PACK_EXTENSION)
+                return pack, os.path.relpath(path, pack.mission_path).replace(os.sep, "/")
+            if os.path.isdir(folder):
+                with _packs_lock:
+                    _unpacked.add(os.path.normcase(folder))
+        folder = os.path.dirname(folder)
+    return None, None
+
+
+def open_input(path, mode="rb", encoding=None, newline=None):
+    """
+    Opens a mission file for reading: from the disk, or from its pack when the mission is packed.
+    A file on disk takes precedence, so outputs written next to a pack replace the copy stored in it.
+    """
+    try:
+        return open(path, mode, encoding=encoding, newline=newline)
+    except FileNotFoundError:
+        pack, name = find_member(path)
+        if pack is None or name not in pack.members:
+            raise
+    f = pack.open(name)
+    return f if "b" in mode else io.TextIOWrapper(f, encoding=encoding, newline=newline)
+
+
+def input_exists(path):
+    """os.path.exists, members of packed missions included."""
+    if os.path.exists(path):
+        return True
+    pack, name = find_member(path)
+    return pack is not None and name in pack.members
+
+
+def input_size(path):
+    """os.path.getsize, members of packed missions included."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        pack, name = find_member(path)
+        if pack is None or name not in pack.members:
+            raise
+    return pack.members[name].file_size
+
+
+def input_listdir(folder):
+    """os.listdir of a folder inside a mission, merged with the entries stored in its pack (empty if neither exists)."""
+    names = set(os.listdir(folder)) if os.path.isdir(folder) else set()
+    pack, name = find_member(folder)
+    if pack is not None:
+        prefix = name + "/"
+        names.update(member[len(prefix):].split("/")[0] for member in pack.members if member.startswith(prefix))
+    return sorted(names)
+
+
+def locate(path):
+    """Returns (file on disk, offset) where the bytes of `path` start: the pack and the member offset if packed."""
+    if os.path.exists(path):
+        return path, 0
+    pack, name = find_member(path)
+    if pack is None or name not in pack.members:
+        raise FileNotFoundError(path)
+    return pack.pack_path, pack.data_offset(name)
+
+
+def mission_exists(path):
+    """True for a mission folder, or for a mission stored as RTE_mission_*.zip."""
+    path = os.path.normpath(path)
+    return os.path.isdir(path) or (os.path.basename(path).startswith(MISSION_PREFIX)
+                                   and os.path.isfile(path + PACK_EXTENSION))
+
+
+def pack_mission(mission_path, remove_folder=False):
+    """
+    Stores a whole mission folder (outputs included) in RTE_mission_*.zip next to it: members uncompressed,
+    in path order, each with its exact mtime so that the manifests and the hash cache stay valid.
+    The pack is written under a temporary name and renamed once complete; with remove_folder=True the folder
+    is deleted once the pack's index has been checked against it. Returns the pack path.
+    """
+    mission_path = os.path.normpath(mission_path)
+    pack_path = mission_path + PACK_EXTENSION
+    files = []
+    for dirpath, dirnames, filenames in os.walk(mission_path):
+        dirnames.sort()
+        files.extend(os.path.join(dirpath, filename) for filename in sorted(filenames))
+
+    close_pack(pack_path)
+    expected = {}
+    with atomic_open(pack_path, "wb") as f, \
+            zipfile.ZipFile(f, "w", zipfile.ZIP_STORED, allowZip64=True, strict_timestamps=False) as archive:
+        for file_path in files:
+            stat = os.stat(file_path)
+            arcname = os.path.relpath(file_path, mission_path).replace(os.sep, "/")
+            archive.write(file_path, arcname)
+            archive.filelist[-1].comment = repr(stat.st_mtime).encode()    # Écrit dans l'index à la fermeture
+            expected[arcname] = stat.st_size
+    with _packs_lock:
+        _unpacked.discard(os.path.normcase(os.path.abspath(mission_path)))
+    logger.info(f"[Success] {len(files)} files packed into {pack_path}")
+
+    if remove_folder:
+        with zipfile.ZipFile(pack_path) as archive:
+            stored = {info.filename: info.file_size for info in archive.infolist()}
+        if stored != expected:
+            raise OSError(f"Pack {pack_path} does not match {mission_path}, folder kept")
+        for dirpath, dirnames, filenames in os.walk(mission_path, topdown=False):
+            for filename in filenames:
+                os.remove(os.path.join(dirpath, filename))
+            os.rmdir(dirpath)
+        logger.info(f"[Success] Folder {mission_path} removed")
+    return pack_path
+
+
+def unpack_mission(pack_path, remove_pack=False):
+    """
+    Restores a packed mission as a folder next to its pack, with the original mtimes. Files already on disk
+    are kept as they are (they take precedence over the pack when reading). Returns the folder path.
+    """
+    mission_path = mission_of(pack_path)
+    restored = 0
+    with zipfile.ZipFile(pack_path) as archive:
+        for info in archive.infolist():
+            target = os.path.join(mission_path, *info.filename.split("/"))
+            if info.is_dir() or os.path.exists(target):
+                continue
+            archive.extract(info, mission_path)
+            mtime = _member_mtime(info)
+            os.utime(target, (mtime, mtime))
+            restored += 1
+    logger.info(f"[Success] {restored} files restored into {mission_path}")
+    if remove_pack:
+        close_pack(pack_path)
+        os.remove(pack_path)
+        logger.info(f"[Success] Pack {pack_path} removed")
+    return mission_path
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    path = input("Enter the path of a mission folder or of a packed mission (.zip): ").strip()
+    if is_pack(os.path.basename(path)):
+        unpack_mission(path)
+    else:
+        pack_mission(path)
@@ -0,0 +1,179 @@
+import os
+import time
+import cProfile
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.plugins import PLUGINS
+from modules.timing import MissionTimings, recording
+from modules.log_config import aggregate_logs
+
+logger = logging.getLogger(__name__)
+
+# Étapes d'extraction activées d'une mission, dans l'ordre d'affichage des logs (voir modules/plugins.py) :
+# le module d'une étape (pandas, PIL...) n'est importé que si la mission contient des fichiers qu'elle traite
+MISSION_STAGES = tuple((name, plugin) for name, plugin in PLUGINS.items() if plugin.enabled)
+# Loggers des logs d'une mission (aggregate_logs(loggers=...) ne regroupe alors que ceux-là)
+MISSION_LOGGERS = (__name__,) + tuple(plugin.module for _, plugin in MISSION_STAGES)
+
+
+class _ErrorCounter(logging.Handler):
+    """Counts the ERROR records of a stage's logger (files the stage caught an error on and skipped)."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def run_stage(stage, func, rte_neg_path, inventory, timings, in_thread=False):
+    """
+    Runs one stage, in a thread named after the stage if in_thread (used to sort the logs).
+    An error that stops the stage is logged and noted in timings.failed without stopping the other stages.
+    Errors the stage logs itself for single files (e.g. a corrupt JPEG) are counted in timings.partial,
+    so that the journal does not record the stage as done.
+    """
+    if in_thread:
+        threading.current_thread().name = stage
+    stage_logger = logging.getLogger(getattr(func, "module", func.__module__))
+    errors = _ErrorCounter()
+    stage_logger.addHandler(errors)
+    try:
+        with timings.stage(stage):
+            func(rte_neg_path, inventory=inventory)
+    except Exception as e:
+        logger.exception(f"Erreur à l'étape {stage} de {rte_neg_path}: {e}")
+        timings.failed[stage] = str(e)
+    finally:
+        stage_logger.removeHandler(errors)
+    if errors.count and stage not in timings.failed:
+        timings.partial[stage] = errors.count
+
+
+def process_mission(rte_neg_path, threaded=False, inventory=None, timings=None, skip=()):
+    """
+    Processes the logs, images and audio of a mission, one stage after the other or in threads.
+    `inventory` (modules.inventory) avoids listing the mission's folders again.
+    The stages in `skip` (already completed, see main.py --resume) are not run again.
+    Returns the duration of each stage (MissionTimings).
+    """
+    timings = timings or MissionTimings(rte_neg_path)
+    logger.info(f"[Success] Traitement du dossier: {rte_neg_path}")
+    stages = [(stage, func) for stage, func in MISSION_STAGES if stage not in skip]
+    if len(stages) < len(MISSION_STAGES):
+        logger.info(f"[Skipped] Étapes déjà terminées : {', '.join(s for s, _ in MISSION_STAGES if s in skip)}")
+
+    if not threaded:
+        for stage, func in stages:
+            run_stage(stage, func, rte_neg_path, inventory, timings)
+        return timings
+
+    with ThreadPoolExecutor(max_workers=len(MISSION_STAGES)) as executor:
+        futures = [executor.submit(run_stage, stage, func, rte_neg_path, inventory, timings, True)
+                   for stage, func in stages]
+        for future in futures:
+            future.result()
+    return timings
+
+
+def timed_mission(rte_neg_path, threaded=False, inventory=None, profile_path=None, aggregate=False, skip=()):
+    """
+    Processes a mission while timing each stage and each extracted file, and returns the summary of the timings.
+    With `profile_path`, the mission is profiled with cProfile; its stages then run one after the other
+    in the same thread, the only one cProfile observes.
+    With `aggregate`, the INFO logs of the mission are replaced by a single summary line.
+    The stages in `skip` are not run again.
+    """
+    timings = MissionTimings(rte_neg_path)
+    start = time.perf_counter()
+    with aggregate_logs(os.path.basename(os.path.normpath(rte_neg_path)), enabled=aggregate), recording(timings):
+        if profile_path:
+            profiler = cProfile.Profile()
+            try:
+                profiler.runcall(process_mission, rte_neg_path, False, inventory, timings, skip)
+            finally:
+                profiler.dump_stats(profile_path)
+        else:
+            process_mission(rte_neg_path, threaded, inventory, timings, skip)
+    timings.wall_s = time.perf_counter() - start
+    return timings.to_dict()
+
+
+class _MissionLogBuffer(logging.Handler):
+    """Keeps the logs of a mission so that the main process can emit them again."""
+
+    STAGE_ORDER = {stage: index for index, (stage, _) in enumerate(MISSION_STAGES)}
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        data = dict(record.__dict__)
+        data["msg"] = record.getMessage()  # Les arguments ne sont pas forcément sérialisables
+        data["args"] = None
+        if record.exc_info:
+            data["exc_text"] = logging.Formatter().formatException(record.exc_info)
+        data["exc_info"] = None
+        data["_seq"] = len(self.records)
+        self.records.append(data)
+
+    def sorted_records(self):
+        """Logs grouped by stage (mission, logs, images, audio), then in emission order."""
+        return sorted(self.records,
+                      key=lambda r: (self.STAGE_ORDER.get(r["threadName"], -1), r["_seq"]))
+
+
+def process_mission_worker(rte_neg_path, inventory=None, profile_path=None, aggregate=False, skip=(),
+                           level=logging.INFO):
+    """
+    Entry point of a worker process: processes one mission and returns its timings and its logs.
+    The root logger is set to `level` while the mission runs: a process started with "spawn" (Windows)
+    does not inherit the configuration of the main process and would otherwise drop the INFO logs.
+    """
+    root_logger = logging.getLogger()
+    buffer = _MissionLogBuffer()
+    previous_handlers, previous_level = root_logger.handlers[:], root_logger.level
+    root_logger.handlers = [buffer]
+    root_logger.setLevel(level)
+    start = time.perf_counter()
+    try:
+        timings = timed_mission(rte_neg_path, threaded=True, inventory=inventory, profile_path=profile_path,
+                                aggregate=aggregate, skip=skip)
+    except Exception as e:
+        logger.exception(f"Erreur lors du traitement de {rte_neg_path}: {e}")
+        timings = {"mission": rte_neg_path, "wall_s": round(time.perf_counter() - start, 4), "stages": {},
+                   "error": str(e)}
+    finally:
+        root_logger.handlers = previous_handlers
+        root_logger.setLevel(previous_level)
+    return timings, buffer.sorted_records()
+
+
+def journal_mission(journal, timings):
+    """
+    Records in the journal (modules.journal) the outcome of each stage run for a mission: "failed", "partial"
+    when the stage skipped files on errors (run again by --resume), otherwise "done".
+    """
+    if journal is None:
+        return
+    failed = timings.get("failed", {})
+    partial = timings.get("partial", {})
+    for stage in timings["stages"]:
+        if stage in failed:
+            journal.record(timings["mission"], stage, "failed", failed[stage])
+        elif stage in partial:
+            journal.record(timings["mission"], stage, "partial", f"{partial[stage]} fichiers en erreur")
+        else:
+            journal.record(timings["mission"], stage)
+
+
+def import_catalog(catalog, rte_neg_path, journal, skip=()):
+    """Feeds the catalog with a mission, unless that was already done in the resumed run."""
+    if not catalog or "catalog" in skip:
+        return
+    catalog.import_mission(rte_neg_path)
+    if journal:
+        journal.record(rte_neg_path, "catalog")
@@ -0,0 +1,66 @@
+from collections import defaultdict
+import numpy as np
+from PIL import Image
+
+STATS_SIZE = (320, 240)         # Taille minimale visée par le décodage réduit (draft) avant le calcul
+PERCENTILES = (1, 5, 50, 95, 99)
+HOT_PIXEL_THRESHOLD = 250       # Intensité (0-255) à partir de laquelle un pixel est considéré chaud
+GRID = 4                        # La zone la plus chaude est cherchée sur une grille GRID x GRID
+
+
+def read_reduced(source, size=STATS_SIZE):
+    """
+    Decodes an image (path or binary file object) as 8-bit luminance. For JPEGs, draft() lets the decoder
+    scale the DCT blocks down so that the result is at least `size`, without a full-resolution decode.
+    """
+    with Image.open(source) as img:
+        img.draft("L", size)
+        return np.asarray(img.convert("L"))
+
+
+def _region(batch, grid):
+    """Returns the (row, col) of the brightest cell of a GRID x GRID split and its mean, for each image."""
+    count, height, width = batch.shape
+    cell_height, cell_width = height // grid, width // grid
+    if not cell_height or not cell_width:
+        return [(0, 0)] * count, batch.reshape(count, -1).mean(axis=1)
+    cells = batch[:, :cell_height * grid, :cell_width * grid] \
+        .reshape(count, grid, cell_height, grid, cell_width).mean(axis=(2, 4)).reshape(count, -1)
+    best = cells.argmax(axis=1)
+    return [divmod(int(index), grid) for index in best], cells[np.arange(count), best]
+
+
+def batch_statistics(arrays, percentiles=PERCENTILES, hot_threshold=HOT_PIXEL_THRESHOLD, grid=GRID):
+    """
+    Computes the intensity statistics of a list of 2-D uint8 arrays, stacked by shape so that every
+    statistic is a single vectorized NumPy call per batch. Returns one dict per array, in order.
+    """
+    results = [None] * len(arrays)
+    by_shape = defaultdict(list)
+    for index, array in enumerate(arrays):
+        by_shape[array.shape].append(index)
+
+    for (height, width), indexes in by_shape.items():
+        batch = np.stack([arrays[index] for index in indexes])
+        flat = batch.reshape(len(indexes), -1)
+        minimums = flat.min(axis=1)
+        maximums = flat.max(axis=1)
+        means = flat.mean(axis=1)
+        values = np.percentile(flat, percentiles, axis=1)
+        hot_ratios = np.count_nonzero(flat >= hot_threshold, axis=1) / flat.shape[1]
+        rows, cols = np.unravel_index(flat.argmax(axis=1), (height, width))
+        regions, region_means = _region(batch, grid)
+
+        for position, index in enumerate(indexes):
+            results[index] = {
+                "DecodedSize": f"{width}x{height}",
+                "Min": int(minimums[position]),
+                "Max": int(maximums[position]),
+                "Mean": round(float(means[position]), 2),
+                "Percentiles": {f"P{p}": round(float(values[i, position]), 2) for i, p in enumerate(percentiles)},
+                "HotPixelRatio": round(float(hot_ratios[position]), 6),
+                "MaxPosition": [round(float(cols[position]) / width, 3), round(float(rows[position]) / height, 3)],  # x, y relatifs
+                "HottestRegion": {"Row": regions[position][0], "Col": regions[position][1], "Grid": grid,
+                                  "Mean": round(float(region_means[position]), 2)},
+            }
+    return results
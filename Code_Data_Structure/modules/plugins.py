@@ -0,0 +1,84 @@
+import os
+import logging
+import importlib
+from modules.inventory import exists
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractorPlugin:
+    """
+    One extraction stage of a mission, registered by the name of its function ("module:function") and imported
+    only the first time a mission actually has files it handles: a mission without CSV never imports pandas.
+    Calling the plugin runs the function as main.py does: func(mission_path, inventory=inventory).
+    """
+
+    def __init__(self, name, subfolder, extensions, target, enabled=True):
+        self.name = name
+        self.subfolder = subfolder                  # Dossier de la mission traité (logs, images, recordings)
+        self.extensions = tuple(extensions)
+        self.target = target
+        self.enabled = enabled                      # False : étape enregistrée mais pas exécutée par main.py
+        self._function = None
+
+    def __repr__(self):
+        return (f"ExtractorPlugin({self.name!r}, {self.subfolder!r}, {self.extensions!r}, {self.target!r}, "
+                f"enabled={self.enabled!r})")
+
+    @property
+    def loaded(self):
+        return self._function is not None
+
+    @property
+    def module(self):
+        """Name of the plugin's module, which is also the name of its logger."""
+        return self.target.split(":")[0]
+
+    def load(self):
+        """Imports the plugin's module (and its dependencies) and returns its function."""
+        if self._function is None:
+            self._function = getattr(importlib.import_module(self.module), self.target.split(":")[1])
+        return self._function
+
+    def has_inputs(self, base_path, inventory=None):
+        """True if the plugin's folder holds at least one matching file (output folders excluded)."""
+        folder = os.path.join(base_path, self.subfolder)
+        if inventory is not None:
+            return any(relative_path.split(os.sep)[0] != "output" and entry.name.lower().endswith(self.extensions)
+                       for relative_path, entry in inventory.iter_files(folder))
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [name for name in dirnames if name != "output"]
+            if any(name.lower().endswith(self.extensions) for name in filenames):
+                return True
+        return False
+
+    def __call__(self, base_path, inventory=None):
+        folder = os.path.join(base_path, self.subfolder)
+        if not exists(folder, inventory):
+            logger.warning(f" No '{self.subfolder}' folder found in {base_path}.")
+            return None
+        if not self.has_inputs(base_path, inventory):
+            logger.info(f"[Skipped] No {'/'.join(self.extensions)} files in {folder}")
+            return None
+        return self.load()(base_path, inventory=inventory)
+
+
+PLUGINS = {}        # nom de l'étape -> ExtractorPlugin, dans l'ordre d'exécution
+
+
+def register_plugin(name, subfolder, extensions, target, enabled=True):
+    """
+    Registers (or replaces) an extraction stage; `target` is "module:function", imported on first use.
+    A stage registered with enabled=False is known (e.g. to the benchmarks) but not run on the missions.
+    """
+    PLUGINS[name] = ExtractorPlugin(name, subfolder, extensions, target, enabled)
+    return PLUGINS[name]
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+THUMBNAILS = False      # Modifiez ici : True pour générer les vignettes et planches contact de chaque caméra
+
+register_plugin("logs", "logs", (".csv",), "modules.log_parser:parse_logs")
+register_plugin("images", "images", IMAGE_EXTENSIONS, "modules.image_metadata:process_images_in_folder")
+register_plugin("thumbnails", "images", IMAGE_EXTENSIONS, "modules.thumbnails:generate_thumbnails", enabled=THUMBNAILS)
+register_plugin("audio", "recordings", (".wav",), "modules.audio_processor:process_audio")
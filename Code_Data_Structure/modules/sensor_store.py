@@ -0,0 +1,224 @@
+import os
+import glob
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+SCHEMA_NAME = "schema.json"
+STORE_SUFFIX = "_columns"       # logs/output/<nom du CSV>_columns/
+TIMESTAMP_KEYWORDS = ("time", "date")
+UNIT_COLUMN = "Unit"
+MERGE_ROWS = 1 << 20            # Lignes recopiées à la fois lors de l'assemblage trié des colonnes
+
+
+def store_path(output_dir, csv_name):
+    """Folder of the columnar store of a CSV, next to its JSON output."""
+    return os.path.join(output_dir, f"{os.path.splitext(csv_name)[0]}{STORE_SUFFIX}")
+
+
+class SensorStoreWriter:
+    """
+    Saves the chunks of a sensor_log CSV (pandas DataFrames) as typed columns into `folder`, as one .npy file
+    per column sorted by timestamp: float64 for numeric columns, int32 codes + categories for text columns
+    (Unit, Sensor...) and datetime64[ms] for the timestamp. Each chunk is written to disk as soon as it is added,
+    so memory stays bounded by the chunk size; save() then assembles the columns on disk, holding only the
+    timestamps and their sort order in memory.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.temp_folder = f"{folder}.tmp"       # Les lecteurs ne voient jamais un stockage incomplet
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+        os.makedirs(self.temp_folder)
+        self.timestamp_column = None
+        self.columns = {}           # nom -> fichiers .npy des blocs déjà écrits, dans l'ordre
+        self.categories = {}        # nom -> {valeur: code} pour les colonnes texte
+        self.rows = 0
+
+    def _encode_text(self, column, values):
+        """Codes of a text column: pd.factorize per chunk, its values then mapped to the codes of the whole file."""
+        mapping = self.categories.setdefault(column, {})
+        codes, uniques = pd.factorize(values)
+        lookup = np.array([mapping.setdefault(str(value), len(mapping)) for value in uniques] + [-1], dtype=np.int32)
+        return lookup[codes]                    # Le code -1 de pandas (vide) prend la dernière case : -1
+
+    def add(self, chunk):
+        if self.timestamp_column is None:
+            self.timestamp_column = next((column for column in chunk.columns
+                                          if any(keyword in column.lower() for keyword in TIMESTAMP_KEYWORDS)), None)
+        for column in chunk.columns:
+            values = chunk[column]
+            if column == self.timestamp_column:
+                array = pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ms]")
+            elif column not in self.categories and (column in self.columns or pd.api.types.is_numeric_dtype(values)):
+                # Le type est fixé par le premier bloc : une valeur non numérique plus loin devient NaN
+                array = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+            else:
+                array = self._encode_text(column, values)
+            parts = self.columns.setdefault(column, [])
+            part_path = os.path.join(self.temp_folder, f"part_{list(self.columns).index(column)}_{len(parts)}.npy")
+            np.save(part_path, array)
+            parts.append(part_path)
+        self.rows += len(chunk)
+
+    def _assemble(self, parts, target_path, order):
+        """Concatenates the chunk files of a column into target_path, in `order` (None if already sorted)."""
+        dtype = np.load(parts[0], mmap_mode="r").dtype
+        unsorted_path = target_path if order is None else f"{target_path}.unsorted.npy"
+        unsorted = np.lib.format.open_memmap(unsorted_path, mode="w+", dtype=dtype, shape=(self.rows,))
+        position = 0
+        for part_path in parts:
+            part = np.load(part_path)
+            unsorted[position:position + len(part)] = part
+            position += len(part)
+            os.remove(part_path)
+        if order is not None:
+            target = np.lib.format.open_memmap(target_path, mode="w+", dtype=dtype, shape=(self.rows,))
+            for start in range(0, self.rows, MERGE_ROWS):
+                target[start:start + MERGE_ROWS] = unsorted[order[start:start + MERGE_ROWS]]
+            target.flush()
+            del target
+        unsorted.flush()
+        del unsorted
+        if order is not None:
+            os.remove(unsorted_path)
+
+    def save(self):
+        """Assembles the columns, sorted by timestamp, and moves the store into place."""
+        if self.timestamp_column is None:
+            self.discard()
+            raise ValueError("no timestamp column found")
+
+        timestamps = np.concatenate([np.load(part) for part in self.columns[self.timestamp_column]])
+        # Les logs sont le plus souvent déjà dans l'ordre : les colonnes sont alors simplement mises bout à bout
+        order = None if np.all(timestamps[1:] >= timestamps[:-1]) else np.argsort(timestamps, kind="stable")
+        del timestamps
+        schema = {"rows": self.rows, "timestamp": self.timestamp_column, "columns": {}}
+        for index, (column, parts) in enumerate(self.columns.items()):
+            file_name = f"col_{index}.npy"       # Les noms de colonnes ne sont pas forcément des noms de fichier valides
+            self._assemble(parts, os.path.join(self.temp_folder, file_name), order)
+            entry = {"file": file_name}
+            if column in self.categories:
+                entry["categories"] = list(self.categories[column])
+            schema["columns"][column] = entry
+        with open(os.path.join(self.temp_folder, SCHEMA_NAME), "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=4, ensure_ascii=False)
+
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.replace(self.temp_folder, self.folder)
+
+    def discard(self):
+        """Removes the chunks written so far (e.g. when the CSV could not be read to the end)."""
+        shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+
+class SensorStore:
+    """
+    Read-only access to a columnar store: columns are memory-mapped, so opening a store costs only
+    the schema read, and a time range is located by binary search on the sorted timestamp column.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, SCHEMA_NAME), "r", encoding="utf-8") as f:
+            self.schema = json.load(f)
+        self._arrays = {}
+
+    def __len__(self):
+        return self.schema["rows"]
+
+    @property
+    def columns(self):
+        return list(self.schema["columns"])
+
+    def column(self, name):
+        """Raw memory-mapped column (category codes for text columns)."""
+        if name not in self._arrays:
+            entry = self.schema["columns"][name]
+            self._arrays[name] = np.load(os.path.join(self.folder, entry["file"]), mmap_mode="r")
+        return self._arrays[name]
+
+    @property
+    def timestamps(self):
+        return self.column(self.schema["timestamp"])
+
+    def time_range(self, start=None, end=None):
+        """Returns the (first, last + 1) row indexes of the readings with start <= timestamp < end."""
+        timestamps = self.timestamps
+        first = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(start, "ms"), side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.datetime64(end, "ms"), side="left"))
+        return first, last
+
+    def query(self, start=None, end=None, unit=None, columns=None, decode=True):
+        """
+        Returns {column: array} for the readings between start and end (ISO strings or datetime64),
+        optionally restricted to one unit. Text columns are decoded to their values when decode=True.
+        """
+        first, last = self.time_range(start, end)
+        mask = None
+        if unit is not None:
+            categories = self.schema["columns"].get(UNIT_COLUMN, {}).get("categories", [])
+            code = categories.index(unit) if unit in categories else -2
+            mask = self.column(UNIT_COLUMN)[first:last] == code
+
+        result = {}
+        for name in columns or self.columns:
+            values = self.column(name)[first:last]
+            if mask is not None:
+                values = values[mask]
+            categories = self.schema["columns"][name].get("categories")
+            if decode and categories is not None:
+                values = np.array(categories + [None], dtype=object)[values]    # Le code -1 (vide) donne None
+            result[name] = values
+        return result
+
+
+def find_stores(root):
+    """Returns every columnar store found below root (a mission, a week, a month...)."""
+    pattern = os.path.join(glob.escape(root), "**", "logs", "output", f"*{STORE_SUFFIX}", SCHEMA_NAME)
+    return sorted(os.path.dirname(path) for path in glob.glob(pattern, recursive=True))
+
+
+def query_missions(root, start=None, end=None, unit=None, value_column="Value"):
+    """
+    Gathers the readings of every store below root between start and end (optionally for one unit)
+    and returns (timestamps, values) sorted by time.
+    """
+    timestamps, values = [], []
+    for folder in find_stores(root):
+        store = SensorStore(folder)
+        if value_column not in store.schema["columns"]:
+            continue
+        data = store.query(start, end, unit, columns=[store.schema["timestamp"], value_column])
+        timestamps.append(data[store.schema["timestamp"]])
+        values.append(data[value_column])
+    if not timestamps:
+        return np.array([], dtype="datetime64[ms]"), np.array([], dtype=np.float64)
+    timestamps = np.concatenate(timestamps)
+    values = np.concatenate(values)
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], values[order]
+
+
+def downsample(timestamps, values, interval_s, how="mean"):
+    """
+    Aggregates sorted readings into fixed time buckets of `interval_s` seconds (aligned on the epoch).
+    how: "mean", "min", "max" or "count". Returns (bucket start times, aggregated values).
+    """
+    if len(timestamps) == 0:
+        return timestamps, values
+    buckets = timestamps.astype("datetime64[ms]").astype(np.int64) // (interval_s * 1000)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(buckets)])
+    if how == "mean":
+        aggregated = np.add.reduceat(values, starts) / counts
+    elif how == "min":
+        aggregated = np.minimum.reduceat(values, starts)
+    elif how == "max":
+        aggregated = np.maximum.reduceat(values, starts)
+    elif how == "count":
+        aggregated = counts
+    else:
+        raise ValueError(f"Unknown aggregation: {how}")
+    return (buckets[starts] * interval_s * 1000).astype("datetime64[ms]"), aggregated
@@ -0,0 +1,156 @@
+import os
+import math
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw
+from modules.inventory import exists, isdir, listdir
+from modules.timing import timed, parent_folder
+from modules.json_writer import atomic_open
+from modules.mission_pack import open_input, input_exists
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)     # Taille maximale des vignettes (le ratio est conservé)
+SHEET_CELL = (160, 120)         # Taille d'une image sur la planche contact
+SHEET_COLUMNS = 8
+SHEET_MAX_IMAGES = 400          # Au-delà, la planche est découpée en plusieurs fichiers
+LABEL_HEIGHT = 14
+NB_THREADS = 4                  # Le décodage JPEG de PIL libère le GIL : des threads suffisent
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+@timed("thumbnails", group=parent_folder)
+def make_thumbnail(image_path, thumbnail_path, size=THUMBNAIL_SIZE):
+    """
+    Writes a JPEG thumbnail. For JPEG sources, draft() makes the decoder scale the DCT blocks down
+    (1/2, 1/4 or 1/8) so the full-resolution image is never decoded.
+    """
+    with open_input(image_path) as source, Image.open(source) as img:
+        img.draft("RGB", size)
+        img = img.convert("RGB")
+        img.thumbnail(size)
+        with atomic_open(thumbnail_path, "wb") as f:    # Une vignette à moitié écrite serait ensuite jugée à jour
+            img.save(f, "JPEG", quality=80)
+
+
+def make_contact_sheet(thumbnail_paths, sheet_path, cell=SHEET_CELL, columns=SHEET_COLUMNS):
+    """Assembles thumbnails into a grid, each one labelled with its file name."""
+    rows = math.ceil(len(thumbnail_paths) / columns)
+    sheet = Image.new("RGB", (columns * cell[0], rows * (cell[1] + LABEL_HEIGHT)), "white")
+    draw = ImageDraw.Draw(sheet)
+    for index, thumbnail_path in enumerate(thumbnail_paths):
+        x = (index % columns) * cell[0]
+        y = (index // columns) * (cell[1] + LABEL_HEIGHT)
+        with open_input(thumbnail_path) as source, Image.open(source) as img:
+            img.thumbnail(cell)
+            sheet.paste(img, (x + (cell[0] - img.width) // 2, y + (cell[1] - img.height) // 2))
+        draw.text((x + 2, y + cell[1] + 1), os.path.splitext(os.path.basename(thumbnail_path))[0], fill="black")
+    with atomic_open(sheet_path, "wb") as f:
+        sheet.save(f, "JPEG", quality=75)
+
+
+def _existing_files(folder, inventory=None):
+    """
+    Returns {name: mtime} for the files already in an output folder, including those listed in `inventory`
+    (outputs stored in a packed mission); the files on disk take precedence.
+    """
+    existing = {entry.name: entry.mtime for entry in inventory.entries(folder)
+                if not entry.is_dir} if inventory is not None else {}
+    if os.path.isdir(folder):
+        with os.scandir(folder) as entries:
+            existing.update((entry.name, entry.stat().st_mtime) for entry in entries if entry.is_file())
+    return existing
+
+
+def _source_images(folder_path, inventory=None):
+    """Returns {name: mtime} for the images of a camera folder, from the inventory when one is given."""
+    if inventory is not None:
+        return {entry.name: entry.mtime for entry in inventory.entries(folder_path)
+                if not entry.is_dir and entry.name.lower().endswith(IMAGE_EXTENSIONS)}
+    with os.scandir(folder_path) as entries:
+        return {entry.name: entry.stat().st_mtime for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)}
+
+
+def _thumbnail_name(image_name):
+    """Thumbnail of an image, named after its full file name: IP1.jpeg and IP1.png do not share a thumbnail."""
+    return f"{image_name}.jpg"
+
+
+def _sheet_paths(output_folder, camera, count):
+    pages = max(1, math.ceil(count / SHEET_MAX_IMAGES))
+    if pages == 1:
+        return [os.path.join(output_folder, f"{camera}_contact_sheet.jpg")]
+    return [os.path.join(output_folder, f"{camera}_contact_sheet_{page}.jpg") for page in range(1, pages + 1)]
+
+
+def generate_thumbnails(base_path, inventory=None, workers=NB_THREADS):
+    """
+    Generates a thumbnail of every image of every camera folder into images/output/thumbnails/<camera>
+    (<image name>.jpg, e.g. IP1.jpeg.jpg), plus a contact sheet per camera. Thumbnails newer than their source image are kept as they are,
+    and the contact sheet is only rebuilt when one of its thumbnails changed.
+    """
+    images_path = os.path.join(base_path, "images")
+    output_path = os.path.join(images_path, "output", "thumbnails")
+
+    if not exists(images_path, inventory):
+        logger.warning("No 'images' folder found.")
+        return
+
+    tasks = []
+    cameras = {}
+    for folder in sorted(listdir(images_path, inventory)):
+        folder_path = os.path.join(images_path, folder)
+        if not isdir(folder_path, inventory) or folder == "output":
+            continue
+        sources = _source_images(folder_path, inventory)
+        if not sources:
+            continue
+        thumbnails_folder = os.path.join(output_path, folder)
+        existing = _existing_files(thumbnails_folder, inventory)
+
+        expected = {_thumbnail_name(name) for name in sources}
+        stale = set(existing) - expected
+        for name in stale:                                  # Images supprimées depuis le dernier passage
+            if os.path.exists(os.path.join(thumbnails_folder, name)):  # Une copie dans un pack reste en place
+                os.remove(os.path.join(thumbnails_folder, name))
+
+        for name, mtime in sources.items():
+            thumbnail_name = _thumbnail_name(name)
+            if existing.get(thumbnail_name, -1) < mtime:
+                os.makedirs(thumbnails_folder, exist_ok=True)
+                tasks.append((folder, os.path.join(folder_path, name), os.path.join(thumbnails_folder, thumbnail_name)))
+        cameras[folder] = (thumbnails_folder, sorted(expected), bool(stale))
+
+    updated = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(make_thumbnail, source, target): (camera, source) for camera, source, target in tasks}
+        for future, (camera, source) in futures.items():
+            try:
+                future.result()
+                updated[camera] = updated.get(camera, 0) + 1
+            except (OSError, ValueError) as e:
+                logger.error(f"Error creating thumbnail for {source}: {e}")
+
+    sheets_present = _existing_files(output_path, inventory)
+    for camera, (thumbnails_folder, names, removed) in cameras.items():
+        thumbnails = [os.path.join(thumbnails_folder, name) for name in names
+                      if input_exists(os.path.join(thumbnails_folder, name))]
+        if not thumbnails:
+            continue
+        sheets = _sheet_paths(output_path, camera, len(thumbnails))
+        if not updated.get(camera) and not removed and all(os.path.basename(s) in sheets_present for s in sheets):
+            logger.info(f"[Skipped] Thumbnails of {camera} up to date")
+            continue
+        for name in sheets_present:                         # Pages d'une ancienne planche plus longue
+            if name.startswith(f"{camera}_contact_sheet") and os.path.join(output_path, name) not in sheets \
+                    and os.path.exists(os.path.join(output_path, name)):
+                os.remove(os.path.join(output_path, name))
+        for page, sheet_path in enumerate(sheets):
+            make_contact_sheet(thumbnails[page * SHEET_MAX_IMAGES:(page + 1) * SHEET_MAX_IMAGES], sheet_path)
+        logger.info(f"[Success] {updated.get(camera, 0)} thumbnails and contact sheet saved for {camera}")
+
+
+if __name__ == "__main__":
+    base_folder = input("Enter the path to the RTE_neg folder: ").strip()
+    generate_thumbnails(base_folder)
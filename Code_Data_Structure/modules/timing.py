@@ -0,0 +1,182 @@
+import os
+import json
+import logging
+import threading
+import functools
+from time import perf_counter
+from contextlib import contextmanager
+from modules.json_writer import atomic_open
+from modules.mission_pack import input_size
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_MB = 1024 * 1024
+
+_active = None      # Mesures de la mission en cours dans ce processus (une mission à la fois par processus)
+
+
+def parent_folder(path):
+    """Name of the folder containing a file (the camera for an image)."""
+    return os.path.basename(os.path.dirname(path))
+
+
+def _rates(files, nbytes, seconds):
+    return {
+        "files": files,
+        "input_mb": round(nbytes / BYTES_PER_MB, 3),
+        "files_per_s": round(files / seconds, 2) if seconds > 0 else None,
+        "mb_per_s": round(nbytes / BYTES_PER_MB / seconds, 3) if seconds > 0 else None,
+    }
+
+
+class MissionTimings:
+    """Wall time of each stage of a mission, with the files, bytes and time spent in each extraction function."""
+
+    def __init__(self, mission):
+        self.mission = mission
+        self.wall_s = 0.0
+        self.stages = {}
+        self.failed = {}                    # étape -> message d'erreur
+        self.partial = {}                   # étape -> nombre de fichiers en erreur (étape terminée quand même)
+        self.lock = threading.Lock()        # Les étapes d'une mission tournent dans des threads
+
+    def _stage(self, stage):
+        return self.stages.setdefault(stage, {"wall_s": 0.0, "files": 0, "bytes": 0, "functions": {}, "groups": {}})
+
+    @contextmanager
+    def stage(self, stage):
+        """Adds the wall time of the block to `stage`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._stage(stage)["wall_s"] += perf_counter() - start
+
+    def add_call(self, stage, function, seconds, nbytes=None, group=None):
+        """Records one call of an extraction function; nbytes=None when the file was already counted."""
+        with self.lock:
+            data = self._stage(stage)
+            data["functions"][function] = data["functions"].get(function, 0.0) + seconds
+            if nbytes is not None:
+                data["files"] += 1
+                data["bytes"] += nbytes
+            if group is not None:
+                group_data = data["groups"].setdefault(group, {"seconds": 0.0, "files": 0, "bytes": 0})
+                group_data["seconds"] += seconds
+                if nbytes is not None:
+                    group_data["files"] += 1
+                    group_data["bytes"] += nbytes
+
+    def to_dict(self):
+        """JSON-friendly summary, with files/s and MB/s for each stage and group."""
+        stages = {}
+        for stage, data in self.stages.items():
+            stages[stage] = {
+                "wall_s": round(data["wall_s"], 4),
+                **_rates(data["files"], data["bytes"], data["wall_s"]),
+                "functions_s": {name: round(seconds, 4) for name, seconds in data["functions"].items()},
+                "groups": {group: {"seconds": round(g["seconds"], 4), **_rates(g["files"], g["bytes"], g["seconds"])}
+                           for group, g in sorted(data["groups"].items())},
+            }
+        summary = {"mission": self.mission, "wall_s": round(self.wall_s, 4), "stages": stages}
+        if self.failed:
+            summary["failed"] = dict(self.failed)
+        if self.partial:
+            summary["partial"] = dict(self.partial)
+        return summary
+
+
+@contextmanager
+def recording(timings):
+    """Makes `timings` the target of the @timed functions for the duration of the block."""
+    global _active
+    previous, _active = _active, timings
+    try:
+        yield timings
+    finally:
+        _active = previous
+
+
+def record_call(stage, function, seconds, nbytes=None, group=None):
+    """Records a call timed elsewhere (e.g. in a worker process) into the active recording, if any."""
+    if _active is not None:
+        _active.add_call(stage, function, seconds, nbytes, group)
+
+
+def timed(stage, path_arg=0, count_file=True, group=None):
+    """
+    Decorator timing an extraction function while a mission is being recorded (see `recording`).
+    `path_arg` is the position of the file path in the arguments; count_file=False only adds the time
+    (for a second pass over a file already counted); `group(path)` gives the breakdown key (e.g. the camera).
+    Without an active recording the function is called directly.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _active
+            if timings is None:
+                return func(*args, **kwargs)
+            path = args[path_arg]
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                nbytes = None
+                if count_file:
+                    try:
+                        nbytes = input_size(path)
+                    except OSError:
+                        nbytes = 0
+                timings.add_call(stage, func.__name__, seconds, nbytes, group(path) if group else None)
+        return wrapper
+    return decorator
+
+
+def summarize_run(missions, elapsed, **run_info):
+    """
+    Aggregates the summaries (MissionTimings.to_dict) of every mission: per-stage totals (cumulative time,
+    which exceeds the elapsed time when missions run in parallel), per-camera totals and slowest missions first.
+    """
+    totals = {}
+    for mission in missions:
+        for stage, data in mission["stages"].items():
+            total = totals.setdefault(stage, {"wall_s": 0.0, "files": 0, "input_mb": 0.0,
+                                              "functions_s": {}, "groups": {}})
+            total["wall_s"] += data["wall_s"]
+            total["files"] += data["files"]
+            total["input_mb"] += data["input_mb"]
+            for name, seconds in data["functions_s"].items():
+                total["functions_s"][name] = total["functions_s"].get(name, 0.0) + seconds
+            for group, g in data["groups"].items():
+                group_total = total["groups"].setdefault(group, {"seconds": 0.0, "files": 0, "input_mb": 0.0})
+                group_total["seconds"] += g["seconds"]
+                group_total["files"] += g["files"]
+                group_total["input_mb"] += g["input_mb"]
+
+    for total in totals.values():
+        total["files_per_s"] = round(total["files"] / total["wall_s"], 2) if total["wall_s"] > 0 else None
+        total["mb_per_s"] = round(total["input_mb"] / total["wall_s"], 3) if total["wall_s"] > 0 else None
+        total["wall_s"] = round(total["wall_s"], 4)
+        total["input_mb"] = round(total["input_mb"], 3)
+        total["functions_s"] = {name: round(s, 4) for name, s in total["functions_s"].items()}
+        for group_total in total["groups"].values():
+            group_total["files_per_s"] = (round(group_total["files"] / group_total["seconds"], 2)
+                                          if group_total["seconds"] > 0 else None)
+            group_total["seconds"] = round(group_total["seconds"], 4)
+            group_total["input_mb"] = round(group_total["input_mb"], 3)
+
+    return {
+        **run_info,
+        "elapsed_s": round(elapsed, 4),
+        "missions_count": len(missions),
+        "stages": totals,
+        "missions": sorted(missions, key=lambda mission: mission["wall_s"], reverse=True),
+    }
+
+
+def save_report(report, report_path):
+    """Writes the run report as JSON."""
+    with atomic_open(report_path) as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
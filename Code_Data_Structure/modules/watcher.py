@@ -0,0 +1,123 @@
+import os
+import logging
+import threading
+from modules.inventory import scan_tree
+
+logger = logging.getLogger(__name__)
+
+STABLE_POLLS = 3            # Nombre de relevés consécutifs sans changement avant de traiter une mission
+MAX_DEPTH = 3               # Profondeur surveillée sous la racine (archive/neg/Mois/Semaine X)
+MISSION_PREFIX = "RTE_mission_"
+
+
+def _dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def folder_signature(path):
+    """Returns (file count, total bytes, newest mtime) of a folder tree, or None if it cannot be listed."""
+    try:
+        inventory = scan_tree(path)
+    except OSError:
+        return None
+    count, total, newest = 0, 0, 0.0
+    for _, entry in inventory.iter_files(path):
+        count += 1
+        total += entry.size
+        newest = max(newest, entry.mtime)
+    return count, total, newest
+
+
+class MissionWatcher:
+    """
+    Polls a tree for new RTE_mission_* folders without rescanning it: each watched folder (the root and its
+    sub-folders, down to MAX_DEPTH) costs one stat per poll and is only listed again when its mtime changes.
+    A new mission is then measured at every poll and reported by poll() once its file count, size and newest
+    mtime have not changed for `stable_polls` polls in a row, so a download still in progress is never returned.
+    Missions already present when the watcher starts are ignored (see add_candidate).
+    mark_known and add_candidate may be called from another thread than poll(): `known` and `candidates`
+    are only changed under a lock, and the missions are measured outside of it.
+    """
+
+    def __init__(self, root, stable_polls=STABLE_POLLS, max_depth=MAX_DEPTH):
+        self.root = root
+        self.stable_polls = stable_polls
+        self.max_depth = max_depth
+        self.watched = {}           # dossier surveillé -> (mtime au dernier listage, profondeur)
+        self.known = set()          # missions déjà traitées, en file d'attente ou présentes au démarrage
+        self.candidates = {}        # mission -> (dernière signature, nombre de relevés identiques)
+        self._lock = threading.RLock()  # known et candidates sont modifiés par le thread de traitement (mark_known)
+        self._watch(root, 0, initial=True)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def _watch(self, folder, depth, initial=False):
+        """Lists a folder, records its mtime and registers its new sub-folders and missions."""
+        mtime = _dir_mtime(folder)
+        if mtime is None:
+            self.watched.pop(folder, None)
+            return
+        self.watched[folder] = (mtime, depth)
+        try:
+            with os.scandir(folder) as entries:
+                sub_folders = [(entry.name, entry.path) for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except OSError as e:
+            logger.warning(f" Cannot list {folder}: {e}")
+            return
+        for name, path in sub_folders:
+            if name.startswith(MISSION_PREFIX):
+                with self._lock:
+                    if self._key(path) in self.known or path in self.candidates:
+                        continue
+                    if initial:
+                        self.known.add(self._key(path))
+                    else:
+                        self.add_candidate(path)
+            elif depth < self.max_depth and path not in self.watched:
+                self._watch(path, depth + 1, initial)
+
+    def add_candidate(self, mission_path):
+        """Queues a mission for debouncing (e.g. an unsorted mission already there at startup)."""
+        with self._lock:
+            if mission_path in self.candidates:
+                return
+            self.known.discard(self._key(mission_path))
+            self.candidates[mission_path] = (None, 0)
+        logger.info(f"Nouvelle mission détectée : {mission_path}")
+
+    def mark_known(self, mission_path):
+        """Declares a mission as handled, so it is not reported again (e.g. once moved to its week folder)."""
+        with self._lock:
+            self.known.add(self._key(mission_path))
+            self.candidates.pop(mission_path, None)
+
+    def poll(self):
+        """One polling pass: returns the missions whose content is stable, each one reported only once."""
+        for folder, (mtime, depth) in list(self.watched.items()):
+            if _dir_mtime(folder) != mtime:
+                self._watch(folder, depth)
+
+        with self._lock:
+            candidates = list(self.candidates.items())
+        ready = []
+        for mission_path, (previous, stable) in candidates:
+            signature = folder_signature(mission_path) if os.path.isdir(mission_path) else None
+            with self._lock:
+                if self.candidates.get(mission_path) != (previous, stable):
+                    continue                    # Marquée connue (ou remise en attente) pendant le relevé
+                if signature is None:           # Mission déplacée ou supprimée entre-temps
+                    del self.candidates[mission_path]
+                    continue
+                stable = stable + 1 if signature == previous and signature[0] else 0
+                if stable >= self.stable_polls:
+                    del self.candidates[mission_path]
+                    self.known.add(self._key(mission_path))
+                    ready.append(mission_path)
+                else:
+                    self.candidates[mission_path] = (signature, stable)
+        return ready
@@ -2,48 +2,54 @@ import os
 import shutil
 import logging
 import calendar
+from functools import lru_cache
 from collections import defaultdict
 from datetime import date, timedelta
-
-# Configuration du logger
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Création d'un handler pour écrire les logs dans un fichier
-file_handler = logging.FileHandler('log_organisation_semaine.txt')
-file_handler.setLevel(logging.INFO)
-
-# Format des logs
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-
-# Ajout des handlers au logger
-logger.addHandler(file_handler)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-def get_date_from_name(base_path):
+from types import MappingProxyType
+from modules.inventory import listdir
+from modules.mission_pack import PACK_EXTENSION, is_pack, mission_of, close_pack
+from modules.log_config import setup_logging, aggregate_logs
+
+# Configuration du logger : fichier avec rotation + terminal, écrits par un thread dédié (voir modules/log_config.py)
+logger = logging.getLogger(__name__)
+LOG_FILE = 'log_organisation_semaine.txt'
+AGGREGATE_LOGS = False      # True : une ligne de résumé au lieu d'une ligne par mission déplacée
+
+MOIS_MAP = {
+    "Janvier": 1, "Février": 2, "Mars": 3, "Avril": 4, "Mai": 5, "Juin": 6,
+    "Juillet": 7, "Août": 8, "Septembre": 9, "Octobre": 10, "Novembre": 11, "Décembre": 12
+}
+
+def parse_mission_date(folder_name):
+    """Retourne (année, mois, jour) à partir d'un nom RTE_mission_neg_AAAA-MM-JJ_hh_mm_ss, ou None."""
+    parts = folder_name.split('_')
+    if len(parts) < 4:
+        return None
+    try:
+        year, month, day = parts[3].split('-')
+        return int(year), int(month), int(day)
+    except ValueError:
+        return None
+
+def get_date_from_name(base_path, inventory=None):
     """Extrait le jour (JJ) du nom et retourne le numéro de la semaine."""
     dates = []
-    for folder_name in os.listdir(base_path):
-        parts = folder_name.split('_')
-        if len(parts)>=4:
-            date_part = parts[3]
-            try:
-                year, month, day = date_part.split('-')
-                year = int(year)
-                month = int(month)
-                day = int(day)
-                dates.append((year, month, day))
-            except ValueError:
-                continue
-        else:
-            continue
+    for folder_name in listdir(base_path, inventory):
+        date_mission = parse_mission_date(folder_name)
+        if date_mission is not None:
+            dates.append(date_mission)
     return dates
 
+def numero_semaine_du_mois(annee, mois, jour):
+    """
+    Retourne le numéro de la semaine du mois (1 à 6) d'une date. Les semaines commencent le lundi,
+    comme les semaines calendaires de get_jours_ouvres_par_semaine : la semaine 2 commence au premier
+    lundi qui n'est pas le 1er du mois.
+    """
+    premier_jour_du_mois = date(annee, mois, 1)
+    decalage = premier_jour_du_mois.weekday()  # Jours de la semaine 1 avant le 1er : 0 si lundi, 6 si dimanche
+    return ((jour + decalage - 1) // 7) + 1
+
 def assigner_semaines_du_mois(base_path):
     """
     Attribue une semaine du mois à chaque date au format (année, mois, jour).
@@ -52,12 +58,7 @@ def assigner_semaines_du_mois(base_path):
     dates = get_date_from_name(base_path)
     semaines = []
     for y, m, d in dates:
-        jour_date = date(y, m, d)
-        # Trouver le jour du mois correspondant au premier lundi
-        premier_jour_du_mois = date(y, m, 1)
-        decalage = (premier_jour_du_mois.weekday() + 1) % 7  # 0 si lundi, 6 si dimanche
-        numero_semaine = ((d + decalage - 1) // 7) + 1
-        semaines.append(f"Semaine {numero_semaine}")
+        semaines.append(f"Semaine {numero_semaine_du_mois(y, m, d)}")
     return semaines
 
 def creer_dossiers_semaines(base_path, semaines):
@@ -82,17 +83,15 @@ def move_folders_by_weeks_list(base_path, dates, semaines):
     if len(dates) != len(semaines):
         raise ValueError("Les listes dates et semaines doivent avoir la même longueur.")
 
-    # Associer noms de dossiers à leurs dates (on suppose que l'ordre dans os.listdir est le même que dates)
-    dossier_names = [name for name in os.listdir(base_path)
-                     if os.path.isdir(os.path.join(base_path, name))
-                     and not name.startswith("Semaine")]
-
-    # Tri pour synchroniser l’ordre des dossiers avec l’ordre de la liste dates
-    dossier_names.sort()  # suppose que leur ordre lexicographique correspond à l'ordre chronologique
+    # Associer chaque dossier à sa semaine à partir de la date lue dans son nom (et non de l'ordre de os.listdir)
+    semaine_par_date = dict(zip(dates, semaines))
 
-    for i, folder_name in enumerate(dossier_names):
-        semaine = semaines[i]
+    for folder_name in os.listdir(base_path):
         folder_path = os.path.join(base_path, folder_name)
+        date_mission = parse_mission_date(folder_name)
+        if not os.path.isdir(folder_path) or folder_name.startswith("Semaine") or date_mission not in semaine_par_date:
+            continue
+        semaine = semaine_par_date[date_mission]
         week_folder_path = os.path.join(base_path, semaine)
 
         # Créer le dossier Semaine X s’il n’existe pas
@@ -102,31 +101,28 @@ def move_folders_by_weeks_list(base_path, dates, semaines):
         shutil.move(folder_path, dest_path)
         print(f"{folder_name} déplacé vers {semaine}")
 
+@lru_cache(maxsize=None)
 def get_jours_ouvres_par_semaine(annee: int, mois: int):
     """
     Regroupe les jours ouvrés (lundi à vendredi) du mois en fonction
     des semaines ISO du calendrier, numérotées par "Semaine X" du mois.
 
     La semaine commence le lundi, donc les jours ouvrés sont regroupés
-    par semaine calendaire.
+    par semaine calendaire. Le résultat est mémorisé : chaque mois n'est calculé qu'une fois.
+    Il est partagé entre les appelants, donc renvoyé en lecture seule (jours en tuples).
     """
 
     jours_ouvres_par_semaine = defaultdict(list)
     current_day = date(annee, mois, 1)
-    
-    # Trouver la semaine ISO du premier jour du mois
-    semaine_debut = current_day.isocalendar()[1]
 
     while current_day.month == mois:
         if current_day.weekday() < 5:  # lundi=0, ... vendredi=4
-            # numéro de semaine ISO dans l'année
-            num_semaine_iso = current_day.isocalendar()[1]
-            # Calculer semaine relative au mois
-            semaine_relative = num_semaine_iso - semaine_debut + 1
-            semaine = f"Semaine {semaine_relative}"
+            # Semaine relative au mois, comptée comme pour le rangement des missions (le numéro ISO
+            # repasse à 1 fin décembre et ne peut pas servir de référence)
+            semaine = f"Semaine {numero_semaine_du_mois(annee, mois, current_day.day)}"
             jours_ouvres_par_semaine[semaine].append(current_day)
         current_day += timedelta(days=1)
-    return jours_ouvres_par_semaine
+    return MappingProxyType({semaine: tuple(jours) for semaine, jours in jours_ouvres_par_semaine.items()})
 
 def verifier_nombre_donnees(base_path, dates, semaines):
     """
@@ -144,13 +140,9 @@ def verifier_nombre_donnees(base_path, dates, semaines):
     parts = nom_mois.split('_')
     mois_str, annee_str = parts[0], parts[1]
 
-    mois_map = {
-        "Janvier": 1, "Février": 2, "Mars": 3, "Avril": 4, "Mai": 5, "Juin": 6,
-        "Juillet": 7, "Août": 8, "Septembre": 9, "Octobre": 10, "Novembre": 11, "Décembre": 12
-    }
-
-    mois = mois_map.get(mois_str, 0)
+    mois = MOIS_MAP.get(mois_str, 0)
     annee = int(annee_str)
+    jours_ouvres = get_jours_ouvres_par_semaine(annee, mois)
 
     for i in range(1, 6):
         semaine = f"Semaine {i}"
@@ -159,11 +151,11 @@ def verifier_nombre_donnees(base_path, dates, semaines):
         if not os.path.isdir(dossier_semaine):
             logger.warning(f"{dossier_semaine} n'existe pas.")
             continue
-        jours_ouvres = get_jours_ouvres_par_semaine(annee, mois)
-        
+
         nb_attendus = len(jours_ouvres.get(semaine, []))
-        contenus = [f for f in os.listdir(dossier_semaine)
-                    if os.path.isdir(os.path.join(dossier_semaine, f)) or os.path.isfile(os.path.join(dossier_semaine, f))]
+        # Une mission archivée (RTE_mission_*.zip) et le dossier de ses sorties ne comptent qu'une fois
+        contenus = sorted({mission_of(f) if is_pack(f) else f for f in os.listdir(dossier_semaine)
+                           if os.path.isdir(os.path.join(dossier_semaine, f)) or os.path.isfile(os.path.join(dossier_semaine, f))})
         nb_present = len(contenus)
 
         # Affichage avec chemin
@@ -182,16 +174,118 @@ def verifier_nombre_donnees(base_path, dates, semaines):
 
 
 
-if __name__ == "__main__":
-    base_path = input("Entrez le chemin du dossier : ").strip()
-    #if os.path.isdir(base_path):
-    dates = get_date_from_name(base_path)
-    semaines = assigner_semaines_du_mois(base_path)
-    
-    creer_dossiers_semaines(base_path, semaines)
-    move_folders_by_weeks_list(base_path, dates, semaines)
+def parse_dossier_mois(folder_name):
+    """Retourne (année, mois) pour un dossier mois du type 'Janvier_2025_neg', ou None."""
+    parts = folder_name.split('_')
+    if len(parts) < 2 or parts[0] not in MOIS_MAP or not parts[1].isdigit():
+        return None
+    return int(parts[1]), MOIS_MAP[parts[0]]
 
-    verifier_nombre_donnees(base_path, dates, semaines)
-    logger.info("Tri terminé et vérification des sous-dossiers effectuée !")
-else:
-    logger.error("Chemin invalide.")
+def sous_dossiers(dossier, inventory=None):
+    """
+    Retourne les (nom, chemin) des sous-dossiers, depuis l'inventaire s'il est fourni.
+    Une mission archivée (RTE_mission_*.zip) compte comme le dossier de sa mission.
+    """
+    if inventory is not None:
+        return sorted((entry.name, entry.path) for entry in inventory.entries(dossier) if entry.is_dir)
+    with os.scandir(dossier) as entries:
+        dossiers = {(mission_of(entry.name), mission_of(entry.path)) if is_pack(entry.name) else (entry.name, entry.path)
+                    for entry in entries if entry.is_dir() or (is_pack(entry.name) and entry.is_file())}
+    return sorted(dossiers)
+
+def trouver_dossiers_mois(archive_path, inventory=None):
+    """Retourne les dossiers mois d'une archive : l'archive elle-même, ses sous-dossiers neg/pos ou leurs sous-dossiers."""
+    if parse_dossier_mois(os.path.basename(os.path.normpath(archive_path))):
+        return [archive_path]
+    dossiers_mois = []
+    a_parcourir = [(archive_path, 0)]
+    while a_parcourir:
+        dossier, profondeur = a_parcourir.pop()
+        for nom, chemin in sous_dossiers(dossier, inventory):
+            if parse_dossier_mois(nom):
+                dossiers_mois.append(chemin)
+            elif profondeur < 1:            # ex : archive/neg/Janvier_2025_neg
+                a_parcourir.append((chemin, profondeur + 1))
+    return sorted(dossiers_mois)
+
+def planifier_archive(archive_path, inventory=None):
+    """
+    Parcourt une seule fois toute une archive (ex : neg et pos de Novembre 2024 à Juillet 2025)
+    et construit le plan de déplacement de chaque mission non triée vers son dossier 'Semaine X',
+    à partir de la date lue dans le nom de la mission.
+    Retourne une liste de (dossier mois, date, chemin source, chemin destination).
+    """
+    plan = []
+    for dossier_mois in trouver_dossiers_mois(archive_path, inventory):
+        for nom, chemin in sous_dossiers(dossier_mois, inventory):
+            if not nom.startswith("RTE_mission"):
+                continue
+            date_mission = parse_mission_date(nom)
+            if date_mission is None:
+                logger.warning(f"Date illisible, dossier ignoré : {chemin}")
+                continue
+            semaine = f"Semaine {numero_semaine_du_mois(*date_mission)}"
+            plan.append((dossier_mois, date_mission, chemin, os.path.join(dossier_mois, semaine, nom)))
+    return plan
+
+def appliquer_plan(plan, dry_run=True):
+    """
+    Applique le plan par renommages (même volume : aucune copie de données).
+    Une mission archivée est déplacée avec son pack (RTE_mission_*.zip) et, s'il existe, le dossier de ses sorties.
+    En mode dry_run, les déplacements sont seulement affichés.
+    """
+    deplaces = 0
+    dossiers_crees = set()
+    for _, _, source, destination in plan:
+        if dry_run:
+            logger.info(f"[Simulation] {source} -> {destination}")
+            continue
+        if os.path.exists(destination) or os.path.exists(destination + PACK_EXTENSION):
+            logger.warning(f"Destination déjà existante, dossier ignoré : {destination}")
+            continue
+        dossier_semaine = os.path.dirname(destination)
+        if dossier_semaine not in dossiers_crees:
+            os.makedirs(dossier_semaine, exist_ok=True)
+            dossiers_crees.add(dossier_semaine)
+        if os.path.isfile(source + PACK_EXTENSION):
+            close_pack(source + PACK_EXTENSION)         # Windows refuse de renommer un fichier ouvert
+            os.rename(source + PACK_EXTENSION, destination + PACK_EXTENSION)
+        if os.path.isdir(source):
+            os.rename(source, destination)
+        deplaces += 1
+    logger.info(f"{len(plan)} missions à déplacer, {deplaces} déplacées{' (simulation)' if dry_run else ''}.")
+    return deplaces
+
+def organiser_archive(archive_path, dry_run=True, inventory=None):
+    """Planifie et applique le tri de toute une archive, puis vérifie le nombre de données de chaque mois."""
+    plan = planifier_archive(archive_path, inventory)
+    with aggregate_logs(os.path.basename(os.path.normpath(archive_path)), enabled=AGGREGATE_LOGS):
+        appliquer_plan(plan, dry_run)
+    if dry_run:
+        return plan
+    dates_par_mois = defaultdict(list)
+    for dossier_mois, date_mission, _, destination in plan:
+        dates_par_mois[dossier_mois].append((date_mission, os.path.basename(os.path.dirname(destination))))
+    for dossier_mois in trouver_dossiers_mois(archive_path):
+        dates_semaines = dates_par_mois.get(dossier_mois, [])
+        verifier_nombre_donnees(dossier_mois, [d for d, _ in dates_semaines], [s for _, s in dates_semaines])
+    return plan
+
+if __name__ == "__main__":
+    setup_logging(LOG_FILE)
+    base_path = input("Entrez le chemin du dossier (mois, ou archive entière neg/pos) : ").strip()
+    if not os.path.isdir(base_path):
+        logger.error("Chemin invalide.")
+    elif parse_dossier_mois(os.path.basename(os.path.normpath(base_path))):
+        dates = get_date_from_name(base_path)
+        semaines = assigner_semaines_du_mois(base_path)
+
+        creer_dossiers_semaines(base_path, semaines)
+        move_folders_by_weeks_list(base_path, dates, semaines)
+
+        verifier_nombre_donnees(base_path, dates, semaines)
+        logger.info("Tri terminé et vérification des sous-dossiers effectuée !")
+    else:
+        simulation = input("Simulation uniquement, sans déplacer les dossiers ? (o/n) : ").strip().lower() != "n"
+        organiser_archive(base_path, dry_run=simulation)
+        logger.info("Tri de l'archive terminé !")
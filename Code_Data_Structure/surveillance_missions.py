@@ -0,0 +1,119 @@
+import os
+import time
+import queue
+import logging
+import threading
+from modules.watcher import MissionWatcher
+from modules.inventory import scan_tree
+from modules.integrity import HashCache
+from modules.log_config import setup_logging, aggregate_logs
+from modules.pipeline import MISSION_LOGGERS, process_mission
+from organisation_semaineV2 import (parse_mission_date, numero_semaine_du_mois, parse_dossier_mois,
+                                    planifier_archive, appliquer_plan, verifier_nombre_donnees)
+from vérification_taille_data_V2 import (load_reference_manifest, check_single_mission,
+                                         INTEGRITY_CACHE, VERIFY_CHECKSUMS)
+
+# Configuration du logger : fichier avec rotation + terminal, écrits par un thread dédié (voir modules/log_config.py)
+logger = logging.getLogger(__name__)
+LOG_FILE = "log_surveillance.txt"
+
+POLL_INTERVAL = 30          # Secondes entre deux relevés (Modifiez ici)
+STABLE_POLLS = 3            # Relevés consécutifs sans changement de taille avant de traiter une mission (≈ 90 s)
+AGGREGATE_LOGS = False      # True : une ligne de résumé par mission au lieu d'une ligne par fichier traité
+
+
+def classer_mission(chemin, watcher):
+    """
+    Range une mission téléchargée à la racine d'un dossier mois dans son dossier 'Semaine X'.
+    Retourne le nouveau chemin, ou None si la mission ne peut pas être rangée.
+    """
+    dossier_parent, nom = os.path.split(os.path.normpath(chemin))
+    if os.path.basename(dossier_parent).startswith("Semaine"):
+        return chemin                       # Déjà rangée
+    date_mission = parse_mission_date(nom)
+    if date_mission is None:
+        logger.warning(f"Date illisible, mission non rangée : {chemin}")
+        return None
+
+    destination = os.path.join(dossier_parent, f"Semaine {numero_semaine_du_mois(*date_mission)}", nom)
+    watcher.mark_known(destination)         # Le watcher ne doit pas la redétecter dans 'Semaine X'
+    if not appliquer_plan([(dossier_parent, date_mission, chemin, destination)], dry_run=False):
+        return None
+    if parse_dossier_mois(os.path.basename(dossier_parent)):
+        verifier_nombre_donnees(dossier_parent, [date_mission], [os.path.basename(os.path.dirname(destination))])
+    return destination
+
+
+def traiter_mission(chemin, watcher, manifest, hash_cache=None):
+    """Rangement, extraction des métadonnées puis vérification de complétude d'une mission stable."""
+    chemin = classer_mission(chemin, watcher)
+    if chemin is None:
+        return
+    # Seuls les logs de la mission sont regroupés : le relevé continue de journaliser dans le thread principal
+    with aggregate_logs(os.path.basename(chemin), enabled=AGGREGATE_LOGS, loggers=MISSION_LOGGERS):
+        process_mission(chemin, threaded=True, inventory=scan_tree(chemin))
+    if manifest is not None:
+        check_single_mission(chemin, manifest, hash_cache)
+        if hash_cache:
+            hash_cache.save()
+    logger.info(f"[Success] Mission traitée : {chemin}")
+
+
+def _travailleur(file_missions, watcher, manifest, hash_cache):
+    """Traite les missions de la file une par une, pendant que la surveillance continue."""
+    while True:
+        chemin = file_missions.get()
+        if chemin is None:
+            return
+        try:
+            traiter_mission(chemin, watcher, manifest, hash_cache)
+        except Exception as e:
+            logger.exception(f"Erreur lors du traitement de {chemin}: {e}")
+
+
+def surveiller(racine, intervalle=POLL_INTERVAL, stable_polls=STABLE_POLLS, cycles=None):
+    """
+    Surveille un dossier mois (ou une archive entière) et traite chaque nouvelle mission une fois son
+    téléchargement terminé : rangement dans 'Semaine X', extraction des métadonnées, vérification.
+    Seules les dates de modification des dossiers sont relevées à chaque cycle ; une nouvelle mission
+    n'est mise en file qu'après `stable_polls` relevés identiques (nombre de fichiers, taille, date).
+    Les missions non rangées déjà présentes au démarrage sont aussi traitées. `cycles` limite le nombre
+    de relevés (None : jusqu'à Ctrl+C).
+    """
+    watcher = MissionWatcher(racine, stable_polls=stable_polls)
+    for _, _, source, _ in planifier_archive(racine):
+        watcher.add_candidate(source)
+
+    manifest = load_reference_manifest()
+    if manifest is None:
+        logger.warning("Pas de référence disponible : les missions seront rangées et extraites sans vérification.")
+    hash_cache = HashCache(INTEGRITY_CACHE) if VERIFY_CHECKSUMS else None
+
+    file_missions = queue.Queue()
+    travailleur = threading.Thread(target=_travailleur, args=(file_missions, watcher, manifest, hash_cache),
+                                   name="surveillance", daemon=True)
+    travailleur.start()
+    logger.info(f"Surveillance de {racine} (relevé toutes les {intervalle} s)")
+
+    cycle = 0
+    try:
+        while cycles is None or cycle < cycles:
+            for chemin in watcher.poll():
+                logger.info(f"Téléchargement terminé, mission mise en file : {chemin}")
+                file_missions.put(chemin)
+            cycle += 1
+            time.sleep(intervalle)
+    except KeyboardInterrupt:
+        logger.info("Arrêt demandé : fin du traitement des missions déjà en file...")
+    file_missions.put(None)
+    travailleur.join()
+    logger.info("Surveillance terminée.")
+
+
+if __name__ == "__main__":
+    setup_logging(LOG_FILE)
+    racine = input("Entrez le chemin du dossier à surveiller (mois, ou archive entière neg/pos) : ").strip()
+    if os.path.isdir(racine):
+        surveiller(racine)
+    else:
+        logger.error("Chemin invalide.")
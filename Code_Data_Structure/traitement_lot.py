@@ -0,0 +1,199 @@
+import os
+import time
+import logging
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from modules.inventory import scan_tree, find_missions
+from modules.journal import RunJournal
+from modules.catalog import MetadataCatalog
+from modules.log_config import setup_logging
+from modules.timing import summarize_run, save_report
+from modules.pipeline import MISSION_STAGES, process_mission_worker, journal_mission, import_catalog
+import main
+from organisation_semaineV2 import organiser_archive
+from vérification_taille_data_V2 import load_reference_manifest, check_mission, write_batch_report
+
+# Configuration du logger : fichier avec rotation + terminal, écrits par un thread dédié (voir modules/log_config.py)
+logger = logging.getLogger(__name__)
+LOG_FILE = "log_traitement_lot.txt"
+
+NB_PROCESSUS = 4            # Missions traitées en même temps, tous partages confondus (Modifiez ici)
+PAR_PARTAGE = 2             # Missions traitées en même temps sur un même lecteur / partage réseau
+RAPPORT_LOT = "rapport_traitement_lot.json"     # Durées par étape et par mission de tout le lot
+ETAPES = ("tri", "extraction", "verification")
+BYTES_PER_GB = 1024 ** 3
+
+
+def partage(chemin):
+    """Retourne le lecteur (Z:), le partage réseau (\\\\serveur\\partage) ou le point de montage d'un chemin."""
+    chemin = os.path.abspath(chemin)
+    lecteur, _ = os.path.splitdrive(chemin)
+    if lecteur:
+        return os.path.normcase(lecteur)
+    while not os.path.ismount(chemin):
+        chemin = os.path.dirname(chemin)
+    return chemin
+
+
+def decouvrir_missions(racines):
+    """
+    Parcourt une fois chaque racine et retourne toutes les missions trouvées, avec leur taille
+    (somme des tailles relevées par le parcours, sans relire les fichiers), les plus grosses en premier.
+    """
+    missions = []
+    for racine in racines:
+        inventory = scan_tree(racine)
+        for chemin in find_missions(racine, inventory):
+            missions.append({
+                "mission": chemin,
+                "racine": racine,
+                "partage": partage(chemin),
+                "octets": sum(entry.size for _, entry in inventory.iter_files(chemin)),
+                "inventaire": inventory.subtree(chemin),
+            })
+    missions.sort(key=lambda mission: mission["octets"], reverse=True)
+    return missions
+
+
+def _traiter_mission_lot(chemin, inventory, manifest, extraction, verification, skip, level):
+    """
+    Point d'entrée d'un processus : extraction des métadonnées puis vérification d'une mission.
+    `level` est le niveau de log du processus principal, que les processus lancés en "spawn" n'héritent pas.
+    """
+    timings, records = None, []
+    if extraction:
+        timings, records = process_mission_worker(chemin, inventory, aggregate=main.AGGREGATE_MISSION_LOGS, skip=skip,
+                                                  level=level)
+    resultat = check_mission(chemin, manifest, inventory=inventory) if verification else None
+    return timings, records, resultat
+
+
+def executer_lot(missions, manifest, journaux, workers=NB_PROCESSUS, par_partage=PAR_PARTAGE,
+                 extraction=True, catalog=None):
+    """
+    Répartit les missions sur un pool de `workers` processus, la plus grosse d'abord : les petites missions
+    remplissent la fin de l'exécution au lieu d'attendre la plus longue. Une mission n'est lancée que si son
+    partage a moins de `par_partage` missions en cours, pour ne pas saturer le serveur de fichiers.
+    Retourne (mesures des missions extraites, résultats de vérification).
+    """
+    en_attente = list(missions)
+    en_cours = {}
+    actives = defaultdict(int)              # partage -> missions en cours
+    mission_timings, verifications = [], []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while en_attente or en_cours:
+            # Places libres : la plus grosse mission en attente dont le partage n'est pas saturé
+            for mission in list(en_attente):
+                if len(en_cours) >= workers:
+                    break
+                if actives[mission["partage"]] >= par_partage:
+                    continue
+                en_attente.remove(mission)
+                actives[mission["partage"]] += 1
+                skip = journaux[mission["racine"]].completed(mission["mission"])
+                verification = manifest is not None and "verification" not in skip
+                future = executor.submit(_traiter_mission_lot, mission["mission"], mission["inventaire"], manifest,
+                                         extraction, verification, skip, logging.getLogger().getEffectiveLevel())
+                en_cours[future] = mission
+
+            termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in termines:
+                mission = en_cours.pop(future)
+                actives[mission["partage"]] -= 1
+                journal = journaux[mission["racine"]]
+                try:
+                    timings, records, resultat = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur lors du traitement de {mission['mission']}: {e}")
+                    continue
+                for data in records:            # Logs de la mission réémis d'un bloc, à la fin de la mission
+                    logging.getLogger(data["name"]).handle(logging.makeLogRecord(data))
+                if timings is not None:
+                    journal_mission(journal, timings)
+                    mission_timings.append(timings)
+                    import_catalog(catalog, mission["mission"], journal, journal.completed(mission["mission"]))
+                if resultat is not None:
+                    journal.record(mission["mission"], "verification")
+                    verifications.append(resultat)
+                logger.info(f"[Success] {mission['mission']} ({mission['octets'] / BYTES_PER_GB:.2f} Go) terminée, "
+                            f"{len(en_attente)} missions en attente")
+    return mission_timings, verifications
+
+
+def traiter_lot(racines, etapes=ETAPES, workers=NB_PROCESSUS, par_partage=PAR_PARTAGE, resume=False,
+                simulation=False, catalog_path=main.CATALOG_PATH, report_path=RAPPORT_LOT):
+    """
+    Traite toutes les missions de plusieurs racines (ex : les dossiers neg et pos de toute une année) :
+    tri par semaine, extraction des métadonnées et vérification de complétude, sans aucune saisie.
+    Avec simulation=True, le tri et l'ordre de traitement sont seulement affichés.
+    """
+    for racine in racines:
+        if not os.path.isdir(racine):
+            logger.error(f"Chemin invalide, ignoré : {racine}")
+    racines = [racine for racine in racines if os.path.isdir(racine)]
+    if "tri" in etapes:
+        for racine in racines:
+            organiser_archive(racine, dry_run=simulation)
+
+    missions = decouvrir_missions(racines)
+    total = sum(mission["octets"] for mission in missions)
+    logger.info(f"{len(missions)} missions ({total / BYTES_PER_GB:.2f} Go) sur {len({m['partage'] for m in missions})} "
+                f"partages, {workers} processus dont {par_partage} au plus par partage")
+    if simulation:
+        for mission in missions:
+            logger.info(f"[Simulation] {mission['octets'] / BYTES_PER_GB:.2f} Go  {mission['mission']}")
+        return None
+
+    manifest = None
+    if "verification" in etapes:
+        manifest = load_reference_manifest()
+        if manifest is None:
+            logger.warning("Pas de référence disponible : les missions ne seront pas vérifiées.")
+
+    journaux = {racine: RunJournal(main.JOURNAL_FILE, racine, resume) for racine in racines}
+    toutes_etapes = {stage for stage, _ in MISSION_STAGES} if "extraction" in etapes else set()
+    toutes_etapes |= {"catalog"} if catalog_path and "extraction" in etapes else set()
+    toutes_etapes |= {"verification"} if manifest is not None else set()
+    restantes = [mission for mission in missions
+                 if not journaux[mission["racine"]].completed(mission["mission"]) >= toutes_etapes]
+    if len(restantes) < len(missions):
+        logger.info(f"[Skipped] {len(missions) - len(restantes)} missions déjà terminées lors de l'exécution reprise")
+
+    catalog = MetadataCatalog(catalog_path) if catalog_path and "extraction" in etapes else None
+    start = time.perf_counter()
+    try:
+        mission_timings, verifications = executer_lot(restantes, manifest, journaux, workers, par_partage,
+                                                      "extraction" in etapes, catalog)
+    finally:
+        if catalog:
+            catalog.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f"{len(restantes)} missions traitées en {elapsed:.2f} s")
+
+    report = summarize_run(mission_timings, elapsed, workers=workers, per_share=par_partage,
+                           roots=[os.path.abspath(racine) for racine in racines])
+    if report_path and mission_timings:
+        save_report(report, report_path)
+        logger.info(f"[Success] Rapport de performances enregistré : {report_path}")
+    if verifications:
+        write_batch_report(verifications)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tri, extraction et vérification de toutes les missions de plusieurs dossiers.")
+    parser.add_argument("racines", nargs="+", help="Dossiers à traiter (archive, neg/pos, dossier mois...)")
+    parser.add_argument("--etapes", nargs="+", choices=ETAPES, default=list(ETAPES))
+    parser.add_argument("--processus", type=int, default=NB_PROCESSUS, help="Missions traitées en même temps")
+    parser.add_argument("--par-partage", type=int, default=PAR_PARTAGE,
+                        help="Missions traitées en même temps sur un même partage")
+    parser.add_argument("--resume", action="store_true", help="Reprend la dernière exécution interrompue")
+    parser.add_argument("--simulation", action="store_true",
+                        help="Affiche le tri et l'ordre de traitement sans rien modifier")
+    args = parser.parse_args()
+
+    setup_logging(LOG_FILE)
+    traiter_lot(args.racines, args.etapes, max(1, args.processus), max(1, args.par_partage), args.resume,
+                args.simulation)
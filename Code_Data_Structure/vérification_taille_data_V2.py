@@ -1,93 +1,262 @@
 import os
+import json
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from modules.integrity import HashCache, check_integrity
+from modules.inventory import scan_tree, find_missions
+from modules.json_writer import atomic_open
+from modules.mission_pack import is_pack, mission_of, mission_exists
+from modules.log_config import setup_logging, stop_logging, aggregate_logs
 
-# --- Configuration du logger : terminal + fichier ---
+# --- Configuration du logger : terminal + fichier avec rotation, écrits par un thread dédié ---
 log_filename = "inspection_verification.log"
 
-# Création du handler fichier avec ajout automatique d'une ligne vide entre chaque exécution
-file_handler = logging.FileHandler(log_filename, mode='a', encoding='utf-8')
-stream_handler = logging.StreamHandler()
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[stream_handler, file_handler]
-)
-
 logger = logging.getLogger(__name__)
 
+# --- Paramètres ---
+REFERENCE_FOLDER = "Z:/20. AIR/01. Ross-Robotics/Données_Splashtop/2024-2025/neg/Février_2025_neg/Semaine 4/RTE_mission_neg_2025-02-26_04_00_00"  # Dossier de référence à modifier si l'inspection évolue
+REFERENCE_MANIFEST = "reference_manifest.json"   # Manifeste local de la référence (à supprimer si la référence change)
+BATCH_REPORT = "rapport_verification.json"       # Rapport consolidé du mode lot
+MIN_SIZE_MB = 200           # Taille au-delà de laquelle une mission est considérée complète
+SIZE_TOLERANCE = 0.5        # Un fichier plus petit que 50 % de sa taille de référence est signalé
+NB_THREADS = 8              # Missions vérifiées en parallèle en mode lot
+INTEGRITY_CACHE = "integrity_cache.json"         # Cache local des SHA-256, indexé par (taille, date de modification)
+VERIFY_CHECKSUMS = False    # True : calcule aussi le SHA-256 de chaque fichier, mis en cache dans INTEGRITY_CACHE
+AGGREGATE_LOGS = False      # True : une ligne de résumé au lieu d'un WARNING par fichier manquant ou tronqué
+
 # --- Fonctions ---
 
+BYTES_PER_MB = 1024 * 1024
+
 def get_file_size_in_mb(file_path):
     """Retourne la taille d'un fichier en Mo."""
-    return os.path.getsize(file_path) / (1024 * 1024)
+    return os.path.getsize(file_path) / BYTES_PER_MB
+
+def scan_folder(folder_path, inventory=None):
+    """
+    Parcourt un dossier une seule fois avec os.scandir (y compris sous-dossiers), sans les dossiers output
+    produits par main.py : la taille ne dépend pas de ce que la mission ait déjà été traitée ou non.
+    Retourne (taille totale en octets, {chemin relatif: taille en octets}).
+    Les tailles viennent du cache des DirEntry : pas d'appel stat supplémentaire par fichier sous Windows.
+    Avec un `inventory` (modules.inventory), le dossier n'est pas relu.
+    """
+    if inventory is not None:
+        files = {relative_path: entry.size for relative_path, entry in inventory.iter_files(folder_path)
+                 if not is_generated(to_manifest_path(relative_path))}
+        return sum(files.values()), files
+
+    total_bytes = 0
+    files = {}
+    pending = [("", folder_path)]
+    while pending:
+        relative_dir, current_dir = pending.pop()
+        with os.scandir(current_dir) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "output":
+                        pending.append((relative_path, entry.path))
+                elif entry.is_file():
+                    size = entry.stat().st_size
+                    files[relative_path] = size
+                    total_bytes += size
+    return total_bytes, files
 
 def get_folder_size_in_mb(folder_path):
     """Retourne la taille totale d'un dossier (y compris sous-dossiers) en Mo."""
-    total_size = 0
-    for dirpath, _, filenames in os.walk(folder_path):
-        for filename in filenames:
-            file_path = os.path.join(dirpath, filename)
-            if os.path.isfile(file_path):
-                total_size += get_file_size_in_mb(file_path)
-    return round(total_size, 2)
+    total_bytes, _ = scan_folder(folder_path)
+    return round(total_bytes / BYTES_PER_MB, 2)
 
 def get_files_in_folder(folder_path):
     """Retourne l'ensemble des chemins relatifs des fichiers dans un dossier (récursif)."""
-    files = set()
-    for dirpath, _, filenames in os.walk(folder_path):
-        for filename in filenames:
-            full_path = os.path.join(dirpath, filename)
-            relative_path = os.path.relpath(full_path, folder_path)
-            files.add(relative_path)
-    return files
-
-def compare_folders(reference_folder, target_folder):
-    """Compare les fichiers entre deux dossiers et retourne ceux manquants dans le dossier cible."""
+    _, files = scan_folder(folder_path)
+    return set(files)
+
+def compare_folders(reference_folder, target_folder, target_files=None):
+    """
+    Compare les fichiers entre deux dossiers et retourne ceux manquants dans le dossier cible.
+    `target_files` évite de reparcourir le dossier cible s'il a déjà été scanné.
+    """
     ref_files = get_files_in_folder(reference_folder)
-    tgt_files = get_files_in_folder(target_folder)
+    tgt_files = set(target_files) if target_files is not None else get_files_in_folder(target_folder)
 
     missing_files = ref_files - tgt_files
     return missing_files
 
-# --- Script principal ---
+def to_manifest_path(relative_path):
+    """Chemin relatif au format du manifeste (séparateur '/' quel que soit le système)."""
+    return relative_path.replace(os.sep, "/")
 
-def main():
-    target_folder = input("Entrez le chemin du dossier à vérifier : ").strip()
-    reference_folder = "Z:/20. AIR/01. Ross-Robotics/Données_Splashtop/2024-2025/neg/Février_2025_neg/Semaine 4/RTE_mission_neg_2025-02-26_04_00_00"  # Dossier de référence à modifier si l'inspection évolue
+def is_generated(manifest_path):
+    """Vrai pour les fichiers produits par main.py (dossiers output), qui ne font pas partie du téléchargement."""
+    return "output" in manifest_path.split("/")[:-1]
 
-    if not os.path.isdir(target_folder):
-        logger.error(f"Le dossier cible n'existe pas : {target_folder}")
-        return
+def build_reference_manifest(reference_folder, manifest_path=REFERENCE_MANIFEST):
+    """
+    Parcourt une fois la mission de référence (dossier ou mission archivée) et enregistre localement,
+    pour chaque fichier téléchargé, son chemin relatif et sa taille attendue.
+    Lève ValueError si la référence ne contient aucun fichier (toutes les missions seraient jugées complètes).
+    """
+    if is_pack(os.path.basename(reference_folder)):
+        reference_folder = mission_of(reference_folder)     # Chemin du .zip : la mission qu'il contient
+    total_bytes, files = scan_folder(reference_folder, scan_tree(reference_folder))
+    if not files:
+        raise ValueError(f"Aucun fichier dans la mission de référence : {reference_folder}")
+    manifest = {
+        "reference": reference_folder,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "total_bytes": total_bytes,
+        "files": {to_manifest_path(relative_path): {"size": size}   # Dossiers output déjà exclus par scan_folder
+                  for relative_path, size in sorted(files.items())},
+    }
+
+    # Un manifeste à moitié écrit ferait échouer toutes les vérifications suivantes
+    with atomic_open(manifest_path) as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    logger.info(f"Manifeste de référence créé : {manifest_path} ({len(manifest['files'])} fichiers)")
+    return manifest
 
-    if not os.path.isdir(reference_folder):
+def load_reference_manifest(manifest_path=REFERENCE_MANIFEST, reference_folder=REFERENCE_FOLDER):
+    """Charge le manifeste local de la référence, ou le génère s'il n'existe pas encore."""
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if is_pack(os.path.basename(reference_folder)):
+        reference_folder = mission_of(reference_folder)
+    if not mission_exists(reference_folder):
         logger.error(f"Le dossier de référence n'existe pas : {reference_folder}")
-        return
+        return None
+    try:
+        return build_reference_manifest(reference_folder, manifest_path)
+    except ValueError as e:
+        logger.error(str(e))
+        return None
+
+def check_mission(mission_folder, manifest, hash_cache=None, inventory=None, executor=None):
+    """
+    Compare une mission au manifeste de référence.
+    Retourne la taille de la mission, les fichiers manquants, les fichiers nettement plus petits que la référence
+    et les fichiers tronqués (fin de JPEG, longueur RIFF, dernière ligne CSV).
+    Avec un `hash_cache`, les SHA-256 sont aussi calculés (une seule fois par fichier inchangé) et mis en cache :
+    ils ne sont pas comparés à la référence, dont les photos, WAV et CSV sont propres à une autre mission.
+    Le dossier n'est parcouru qu'une fois : l'inventaire sert à la fois à la taille, à la comparaison et à l'intégrité.
+    Une mission archivée (RTE_mission_*.zip) est vérifiée directement dans son pack, sans extraction.
+    """
+    if inventory is None:
+        inventory = scan_tree(mission_folder)
+    total_bytes, files = scan_folder(mission_folder, inventory)
+    present = {to_manifest_path(path): size for path, size in files.items()
+               if not is_generated(to_manifest_path(path))}
+    expected = manifest["files"]
+
+    missing = sorted(set(expected) - set(present))
+    shortfalls = [
+        {"file": path, "size": present[path], "expected": entry["size"]}
+        for path, entry in sorted(expected.items())
+        if path in present and present[path] < entry["size"] * SIZE_TOLERANCE
+    ]
+    integrity = check_integrity(mission_folder, hash_cache, inventory=inventory, executor=executor)
+    return {
+        "mission": mission_folder,
+        "size_mb": round(total_bytes / BYTES_PER_MB, 2),
+        "expected_size_mb": round(manifest["total_bytes"] / BYTES_PER_MB, 2),
+        "missing": missing,
+        "shortfalls": shortfalls,
+        "truncated": integrity["truncated"],
+        "files_hashed": integrity["files_hashed"],
+        "complete": not (missing or shortfalls or integrity["truncated"]),
+    }
+
+def check_batch(root_folder, manifest, workers=NB_THREADS, hash_cache=None):
+    """
+    Vérifie en parallèle toutes les missions d'un dossier mois ou année, à partir d'un seul inventaire.
+    Les fichiers de toutes les missions sont lus par un seul pool de `workers` threads (au plus `workers`
+    lectures simultanées sur le partage), les missions n'étant qu'aiguillées par le pool extérieur.
+    """
+    inventory = scan_tree(root_folder)
+    missions = find_missions(root_folder, inventory)
+    with ThreadPoolExecutor(max_workers=workers) as integrity_pool, ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda mission: check_mission(mission, manifest, hash_cache, inventory,
+                                                               integrity_pool), missions))
 
-    # Étape 1 : Vérification de la taille
-    folder_size = get_folder_size_in_mb(target_folder)
+def write_batch_report(results, report_path=BATCH_REPORT):
+    """Écrit le rapport consolidé (JSON) et résume les missions incomplètes dans le log."""
+    incomplete = [result for result in results if not result["complete"]]
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "missions_checked": len(results),
+        "missions_incomplete": len(incomplete),
+        "incomplete": incomplete,
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    logger.info(f"{len(results)} missions vérifiées, {len(incomplete)} incomplètes. Rapport : {report_path}")
+    for result in incomplete:
+        logger.warning(f"{result['mission']} : {result['size_mb']} Mo, {len(result['missing'])} fichiers manquants, "
+                       f"{len(result['shortfalls'])} fichiers trop petits, {len(result['truncated'])} fichiers tronqués")
+    return report
+
+# --- Script principal ---
+
+def check_single_mission(target_folder, manifest, hash_cache=None):
+    """Vérification interactive d'une seule mission (fichiers tronqués, taille puis fichiers manquants)."""
+    result = check_mission(target_folder, manifest, hash_cache)
+
+    # Étape 1 : Fichiers tronqués, signalés même si la taille du dossier semble correcte
+    for truncated in result["truncated"]:
+        logger.warning(f"Fichier tronqué : {truncated['file']} ({truncated['problem']})")
+
+    # Étape 2 : Vérification de la taille
+    folder_size = result["size_mb"]
     logger.info(f"Taille du dossier cible : {folder_size} Mo")
 
-    if folder_size >= 200:
-        logger.info(" Le dossier semble complet (≥ 200 Mo). Aucune comparaison nécessaire.")
+    if folder_size >= MIN_SIZE_MB:
+        logger.info(f" Le dossier semble complet (≥ {MIN_SIZE_MB} Mo). Aucune comparaison nécessaire.")
         return
     else:
-        logger.warning(" Le dossier est incomplet (< 200 Mo). Comparaison avec la référence...")
+        logger.warning(f" Le dossier est incomplet (< {MIN_SIZE_MB} Mo). Comparaison avec la référence...")
 
-    # Étape 2 : Comparaison des fichiers
-    missing_files = compare_folders(reference_folder, target_folder)
+    # Étape 3 : Comparaison des fichiers
+    missing_files = result["missing"]
 
     if not missing_files:
         logger.info(" Tous les fichiers attendus sont présents.")
     else:
         logger.warning(f"{len(missing_files)} fichiers manquants :")
-        for f in sorted(missing_files):
+        for f in missing_files:
             logger.warning(f"- {f}")
+    for shortfall in result["shortfalls"]:
+        logger.warning(f"- {shortfall['file']} : {shortfall['size']} octets au lieu d'environ {shortfall['expected']}")
+
+def main():
+    target_folder = input("Entrez le chemin de la mission, ou d'un dossier mois/année à vérifier : ").strip()
+    if is_pack(os.path.basename(target_folder)):
+        target_folder = mission_of(target_folder)       # Mission archivée : vérifiée dans son pack
+
+    if not mission_exists(target_folder):
+        logger.error(f"Le dossier cible n'existe pas : {target_folder}")
+        return
+
+    manifest = load_reference_manifest()
+    if manifest is None:
+        return
+
+    hash_cache = HashCache(INTEGRITY_CACHE) if VERIFY_CHECKSUMS else None
+    if os.path.basename(os.path.normpath(target_folder)).startswith("RTE_mission_"):
+        with aggregate_logs(os.path.basename(os.path.normpath(target_folder)), logging.WARNING, AGGREGATE_LOGS):
+            check_single_mission(target_folder, manifest, hash_cache)
+    else:
+        write_batch_report(check_batch(target_folder, manifest, hash_cache=hash_cache))
+    if hash_cache:
+        hash_cache.save()
 
+    stop_logging()      # Vide la file d'attente des logs avant d'écrire directement dans le fichier
     with open(log_filename, 'a', encoding='utf-8') as f: #retour à la ligne dans le fichier .log
         f.write("\n\n")
 
 # --- Point d'entrée ---
 if __name__ == "__main__":
+    setup_logging(log_filename)
     main()